@@ -0,0 +1,174 @@
+import numpy as np
+
+from grid import read_grid
+from shortest_path import BfsWorkspace, bfs_nearest
+from waypoint_gpt import write_waypoints_to_file
+
+
+def row_intervals(passable):
+    """
+    Tìm các đoạn ô trống liên tiếp trên từng hàng
+    Trả về: (hàng, cột đầu, cột cuối) của mọi đoạn, sắp theo hàng rồi theo cột
+    """
+    rows, cols = passable.shape
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = passable
+    diff = np.diff(padded, axis=1)
+
+    interval_rows, starts = np.nonzero(diff == 1)
+    _, ends = np.nonzero(diff == -1)
+    return interval_rows, starts, ends - 1
+
+
+def decompose(grid):
+    """
+    Phân rã boustrophedon: quét từ trên xuống, một ô phân rã (cell) tiếp tục
+    xuống hàng dưới khi đoạn hiện tại chồng lên đúng một đoạn ở hàng dưới và
+    đoạn đó chỉ chồng lên đúng đoạn hiện tại. Mỗi khi số đoạn thay đổi
+    (gặp chướng ngại vật mới hoặc hai vùng nhập lại) thì mở cell mới.
+    Trả về: danh sách cell, mỗi cell là danh sách làn (hàng, cột đầu, cột cuối) từ trên xuống
+    """
+    rows = grid.rows
+    interval_rows, starts, ends = row_intervals(grid.passable())
+    row_of = interval_rows.tolist()
+    lo = starts.tolist()
+    hi = ends.tolist()
+    n = len(lo)
+    bounds = np.searchsorted(interval_rows, np.arange(rows + 1)).tolist()
+
+    # Đếm số đoạn chồng lên ở hàng trên / dưới (hai con trỏ trên hai hàng liền kề)
+    up = [0] * n
+    down = [0] * n
+    below = [-1] * n
+    for r in range(rows - 1):
+        i, i_end = bounds[r], bounds[r + 1]
+        j, j_end = bounds[r + 1], bounds[r + 2]
+        while i < i_end and j < j_end:
+            if lo[i] <= hi[j] and lo[j] <= hi[i]:
+                down[i] += 1
+                up[j] += 1
+                below[i] = j
+            if hi[i] < hi[j]:
+                i += 1
+            else:
+                j += 1
+
+    # Ghép các đoạn nối một-một thành cell
+    cell_of = [-1] * n
+    cells = []
+    for k in range(n):
+        if cell_of[k] >= 0:
+            continue
+        cell_id = len(cells)
+        lanes = []
+        current = k
+        while True:
+            cell_of[current] = cell_id
+            lanes.append((row_of[current], lo[current], hi[current]))
+            if down[current] != 1 or up[below[current]] != 1:
+                break
+            current = below[current]
+        cells.append(lanes)
+
+    return cells
+
+
+def _cell_entries(lanes):
+    """
+    Bốn điểm vào của cell: (ô, đi từ trên xuống?, làn đầu đi từ trái sang?)
+    """
+    entries = []
+    for from_top, (r, lo, hi) in ((True, lanes[0]), (False, lanes[-1])):
+        entries.append(((r, lo), from_top, True))
+        entries.append(((r, hi), from_top, False))
+    return entries
+
+
+def sweep_cell(lanes, from_top, from_left, path):
+    """
+    Quét cell bằng các làn ngang đi qua đi lại, nối tiếp vào path
+    path[-1] phải là điểm vào tương ứng với from_top, from_left
+    """
+    if not from_top:
+        lanes = lanes[::-1]
+
+    r, lo, hi = lanes[0]
+    if from_left:
+        path.extend((r, x) for x in range(lo + 1, hi + 1))
+        end = hi
+    else:
+        path.extend((r, x) for x in range(hi - 1, lo - 1, -1))
+        end = lo
+
+    for next_r, next_lo, next_hi in lanes[1:]:
+        # Chuyển làn tại cột gần điểm cuối nhất nằm trong phần chồng lên của hai làn
+        col = min(max(end, lo, next_lo), hi, next_hi)
+        step = 1 if col > end else -1
+        path.extend((r, x) for x in range(end + step, col + step, step))
+        path.append((next_r, col))
+
+        # Đi về đầu làn gần hơn rồi quét hết làn theo chiều ngược lại
+        if col - next_lo <= next_hi - col:
+            path.extend((next_r, x) for x in range(col - 1, next_lo - 1, -1))
+            path.extend((next_r, x) for x in range(next_lo + 1, next_hi + 1))
+            end = next_hi
+        else:
+            path.extend((next_r, x) for x in range(col + 1, next_hi + 1))
+            path.extend((next_r, x) for x in range(next_hi - 1, next_lo - 1, -1))
+            end = next_lo
+
+        r, lo, hi = next_r, next_lo, next_hi
+
+    return path
+
+
+def boustrophedon_coverage(grid, start):
+    """
+    Lập đường bao phủ boustrophedon
+    Phân rã vùng trống thành các cell, quét từng cell bằng các làn đi qua đi lại
+    và nối các cell bằng đường BFS ngắn nhất tới điểm vào (góc làn đầu / làn cuối)
+    gần nhất của một cell chưa quét.
+    Trả về: danh sách waypoint (y, x) bắt đầu từ start
+    """
+    cols = grid.cols
+    cells = decompose(grid)
+
+    # Mặt nạ phẳng đếm số điểm vào còn hiệu lực tại mỗi ô
+    entry_count = bytearray(grid.rows * cols)
+    entries_at = {}
+    for cell_id, lanes in enumerate(cells):
+        for pos, from_top, from_left in _cell_entries(lanes):
+            flat = pos[0] * cols + pos[1]
+            entry_count[flat] += 1
+            entries_at.setdefault(flat, []).append((cell_id, from_top, from_left))
+
+    swept = [False] * len(cells)
+    workspace = BfsWorkspace(grid.rows * cols)
+    path = [start]
+
+    for _ in range(len(cells)):
+        leg = bfs_nearest(grid, path[-1], entry_count.__getitem__, workspace)
+        if leg is None:
+            break  # Các cell còn lại không đi tới được từ start
+        path.extend(leg[1:])
+
+        flat = leg[-1][0] * cols + leg[-1][1]
+        cell_id, from_top, from_left = next(entry for entry in entries_at[flat]
+                                            if not swept[entry[0]])
+        sweep_cell(cells[cell_id], from_top, from_left, path)
+
+        swept[cell_id] = True
+        for pos, _, _ in _cell_entries(cells[cell_id]):
+            entry_count[pos[0] * cols + pos[1]] -= 1
+
+    return path
+
+
+def main():
+    grid = read_grid('input_map.txt')
+    waypoints = boustrophedon_coverage(grid, grid.start)
+    write_waypoints_to_file(waypoints, 'waypoint_boustrophedon.txt')
+
+
+if __name__ == "__main__":
+    main()
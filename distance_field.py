@@ -0,0 +1,284 @@
+import hashlib
+from array import array
+from collections import OrderedDict, deque
+
+import numpy as np
+
+
+def adjacency_arrays(grid):
+    """
+    Danh sách kề CSR của Grid (Grid.adjacency) dưới dạng mảng NumPy, không sao chép
+    """
+    offsets, targets = grid.adjacency()
+    dtype = np.int32 if offsets.typecode == 'i' else np.int64
+    return np.frombuffer(offsets, dtype=dtype), np.frombuffer(targets, dtype=dtype)
+
+
+def _source_mask(grid, sources):
+    """
+    Mặt nạ phẳng uint8 của các ô nguồn
+    sources: mặt nạ có kích thước bản đồ (rows, cols) hoặc phẳng (bool, uint8,
+    bytes, bytearray), hoặc danh sách tọa độ (y, x)
+    """
+    size = grid.rows * grid.cols
+    if isinstance(sources, (bytes, bytearray)):
+        mask = np.frombuffer(sources, dtype=np.uint8)
+    elif isinstance(sources, np.ndarray) and sources.shape in (grid.shape, (size,)):
+        mask = sources.ravel()
+    else:
+        mask = np.zeros(size, dtype=np.uint8)
+        cells = np.asarray(sources, dtype=np.int64).reshape(-1, 2)
+        mask[cells[:, 0] * grid.cols + cells[:, 1]] = 1
+    return (mask != 0).astype(np.uint8)
+
+
+def distance_field(grid, sources):
+    """
+    Khoảng cách BFS (4 hướng) từ mọi ô tới ô nguồn gần nhất, một lượt cho nhiều nguồn
+    BFS theo từng tầng bằng NumPy trên danh sách kề CSR: mỗi tầng là một lần
+    gom hàng xóm của cả biên hiện tại, không có vòng lặp Python theo ô.
+    Trả về: mảng int32 phẳng (chỉ số i * cols + j), -1 nếu không tới được nguồn nào
+    """
+    offsets, targets = adjacency_arrays(grid)
+    degree = np.diff(offsets)
+
+    dist = np.full(grid.rows * grid.cols, -1, dtype=np.int32)
+    frontier = np.flatnonzero(_source_mask(grid, sources))
+    dist[frontier] = 0
+
+    level = 0
+    while len(frontier):
+        level += 1
+        counts = degree[frontier]
+        total = int(counts.sum())
+        if total == 0:
+            break
+        # Vị trí trong targets của mọi hàng xóm của các ô trên biên
+        first = np.repeat(offsets[frontier] - (np.cumsum(counts) - counts), counts)
+        neighbors = targets[first + np.arange(total)]
+        neighbors = np.unique(neighbors[dist[neighbors] < 0])
+        dist[neighbors] = level
+        frontier = neighbors
+
+    return dist
+
+
+def grid_hash(grid):
+    """
+    Mã băm nội dung bản đồ (kích thước và mặt nạ ô đi được), dùng làm khóa cache
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(grid.shape, dtype=np.int64).tobytes())
+    digest.update(grid.passable_flat())
+    return digest.hexdigest()
+
+
+class DistanceField:
+    """
+    Trường khoảng cách tới tập nguồn thay đổi dần, để tìm đường tới ô nguồn gần nhất
+    bằng cách đi xuôi gradient (mỗi bước sang ô kề có khoảng cách nhỏ hơn 1)
+    add_sources cập nhật ngay (khoảng cách chỉ giảm, BFS cục bộ từ nguồn mới).
+    remove_sources chỉ ghi nhận: trường cũ vẫn là cận dưới của khoảng cách thật,
+    nên nếu đi xuôi gradient tới một ô vẫn còn là nguồn thì đó là đường ngắn nhất;
+    chỉ khi tới một nguồn đã bị xóa mới sửa lại vùng phụ thuộc vào các nguồn đã xóa.
+    """
+
+    def __init__(self, grid, sources, dist=None):
+        self.cols = grid.cols
+        self.offsets, self.targets = grid.adjacency()
+        self.is_source = bytearray(_source_mask(grid, sources).tobytes())
+        if dist is None:
+            dist = distance_field(grid, self.is_source)
+        self.dist = array('i', np.asarray(dist, dtype=np.int32).tobytes())
+        self._removed = []
+        self._mark = bytearray(len(self.is_source))
+
+    def copy(self):
+        field = DistanceField.__new__(DistanceField)
+        field.cols = self.cols
+        field.offsets, field.targets = self.offsets, self.targets
+        field.is_source = bytearray(self.is_source)
+        field.dist = array(self.dist.typecode, self.dist)
+        field._removed = list(self._removed)
+        field._mark = bytearray(len(self.is_source))
+        return field
+
+    def nbytes(self):
+        """
+        Bộ nhớ của trường: mảng khoảng cách, mặt nạ nguồn và mặt nạ đánh dấu
+        """
+        return len(self.dist) * self.dist.itemsize + len(self.is_source) + len(self._mark)
+
+    def add_sources(self, nodes):
+        """
+        Thêm các ô nguồn (chỉ số phẳng) và giảm khoảng cách quanh chúng
+        """
+        offsets, targets, dist = self.offsets, self.targets, self.dist
+        queue = deque()
+        for node in nodes:
+            self.is_source[node] = 1
+            if dist[node] != 0:
+                dist[node] = 0
+                queue.append(node)
+
+        while queue:
+            node = queue.popleft()
+            d = dist[node] + 1
+            for nxt in targets[offsets[node]:offsets[node + 1]]:
+                if dist[nxt] < 0 or dist[nxt] > d:
+                    dist[nxt] = d
+                    queue.append(nxt)
+
+    def remove_sources(self, nodes):
+        """
+        Bỏ các ô khỏi tập nguồn (ví dụ ô vừa được bao phủ); sửa trường khi cần
+        """
+        for node in nodes:
+            self.remove_source(node)
+
+    def remove_source(self, node):
+        if self.is_source[node]:
+            self.is_source[node] = 0
+            self._removed.append(node)
+
+    def _repair(self):
+        """
+        Sửa trường sau khi xóa nguồn (BFS giảm dần, theo từng đợt)
+        1. Đánh dấu không hợp lệ các ô mà mọi ô kề ở tầng trước đều không hợp lệ
+           (duyệt theo thứ tự tầng từ các nguồn đã xóa)
+        2. Tính lại các ô đó từ ô kề hợp lệ gần nhất bằng hàng đợi theo tầng
+        """
+        offsets, targets, dist, mark = self.offsets, self.targets, self.dist, self._mark
+        removed = [node for node in self._removed if not self.is_source[node] and dist[node] == 0]
+        self._removed = []
+        if not removed:
+            return
+
+        candidate, invalid = 1, 2
+        touched = []
+        queue = deque(removed)
+        for node in removed:
+            mark[node] = candidate
+            touched.append(node)
+
+        while queue:
+            node = queue.popleft()
+            d = dist[node]
+            if d > 0:
+                supported = False
+                for prev in targets[offsets[node]:offsets[node + 1]]:
+                    if dist[prev] == d - 1 and mark[prev] != invalid:
+                        supported = True
+                        break
+                if supported:
+                    continue
+            mark[node] = invalid
+            for nxt in targets[offsets[node]:offsets[node + 1]]:
+                if dist[nxt] == d + 1 and not mark[nxt]:
+                    mark[nxt] = candidate
+                    touched.append(nxt)
+                    queue.append(nxt)
+
+        invalid_nodes = [node for node in touched if mark[node] == invalid]
+        buckets = {}
+        for node in invalid_nodes:
+            best = -1
+            for prev in targets[offsets[node]:offsets[node + 1]]:
+                if mark[prev] != invalid and dist[prev] >= 0 and (best < 0 or dist[prev] < best):
+                    best = dist[prev]
+            if best >= 0:
+                buckets.setdefault(best + 1, []).append(node)
+        for node in invalid_nodes:
+            dist[node] = -1
+
+        level = min(buckets, default=0)
+        while buckets:
+            for node in buckets.pop(level, ()):
+                if dist[node] >= 0:
+                    continue
+                dist[node] = level
+                for nxt in targets[offsets[node]:offsets[node + 1]]:
+                    if mark[nxt] == invalid and dist[nxt] < 0:
+                        buckets.setdefault(level + 1, []).append(nxt)
+            level += 1
+
+        for node in touched:
+            mark[node] = 0
+
+    def _descend(self, node):
+        offsets, targets, dist = self.offsets, self.targets, self.dist
+        path = [node]
+        d = dist[node]
+        while d > 0:
+            d -= 1
+            for nxt in targets[offsets[node]:offsets[node + 1]]:
+                if dist[nxt] == d:
+                    node = nxt
+                    break
+            path.append(node)
+        return path
+
+    def descend(self, node):
+        """
+        Đường ngắn nhất (chỉ số phẳng) từ node tới ô nguồn gần nhất, hoặc None nếu không có
+        """
+        if self.dist[node] >= 0:
+            path = self._descend(node)
+            if self.is_source[path[-1]]:
+                return path
+        if not self._removed:
+            return None
+        self._repair()
+        if self.dist[node] < 0:
+            return None
+        return self._descend(node)
+
+    def path_to_nearest(self, start):
+        """
+        Như descend nhưng nhận và trả về tọa độ (hàng, cột)
+        """
+        path = self.descend(start[0] * self.cols + start[1])
+        if path is None:
+            return None
+        return [divmod(node, self.cols) for node in path]
+
+
+class DistanceFieldCache:
+    """
+    Cache LRU các trường khoảng cách, khóa là (mã băm bản đồ, mã băm tập nguồn)
+    Trường trả về được dùng chung: gọi copy() trước khi thêm / xóa nguồn.
+    Giới hạn cả số trường (maxsize) lẫn tổng bộ nhớ (max_bytes, mặc định 64 MiB);
+    trường lớn hơn max_bytes vẫn được trả về nhưng không được giữ lại.
+    """
+
+    def __init__(self, maxsize=16, max_bytes=64 * 2 ** 20):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._fields = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, grid, sources):
+        mask = _source_mask(grid, sources)
+        key = (grid_hash(grid), hashlib.blake2b(mask.tobytes(), digest_size=16).hexdigest())
+        field = self._fields.get(key)
+        if field is not None:
+            self.hits += 1
+            self._fields.move_to_end(key)
+            return field
+
+        self.misses += 1
+        field = DistanceField(grid, mask)
+        size = field.nbytes()
+        if size > self.max_bytes:
+            return field
+        self._fields[key] = field
+        self.nbytes += size
+        while len(self._fields) > self.maxsize or self.nbytes > self.max_bytes:
+            self.nbytes -= self._fields.popitem(last=False)[1].nbytes()
+        return field
+
+    def clear(self):
+        self._fields.clear()
+        self.nbytes = 0
@@ -0,0 +1,394 @@
+import struct
+import sys
+from array import array
+
+import numpy as np
+
+# Mã của từng loại ô trong lưới (trùng với mã màu trong simulation.py)
+FREE = 0
+OBSTACLE = 1
+START = 2
+GOAL = 3
+
+# Bảng tra ký tự -> mã ô, 255 là ký tự không hợp lệ
+_CHAR_TO_CODE = np.full(256, 255, dtype=np.uint8)
+_CHAR_TO_CODE[ord('0')] = FREE
+_CHAR_TO_CODE[ord('1')] = OBSTACLE
+_CHAR_TO_CODE[ord('*')] = START
+_CHAR_TO_CODE[ord('#')] = GOAL
+
+# Bảng tra mã ô -> ký tự để in hoặc ghi lại bản đồ
+CODE_TO_CHAR = np.array(['0', '1', '*', '#'])
+
+
+class Grid:
+    """
+    Bản đồ lưới dùng chung cho các thuật toán và bộ đánh giá
+    cells: mảng uint8 (rows, cols) chứa các mã FREE/OBSTACLE/START/GOAL
+    start, goal: tọa độ (hàng, cột) của '*' và '#' (None nếu không có)
+    """
+
+    def __init__(self, cells, start=None, goal=None):
+        self.cells = cells
+        self.start = start if start is not None else _find_code(cells, START)
+        self.goal = goal if goal is not None else _find_code(cells, GOAL)
+        self._passable_flat = None
+        self._adjacency = None
+
+    @classmethod
+    def from_array(cls, map_grid, start_pos=None, end_pos=None):
+        """
+        Tạo Grid từ ma trận 0/1 của map_generate.create_square_map
+        """
+        cells = np.where(np.asarray(map_grid) != 0, OBSTACLE, FREE).astype(np.uint8)
+        if start_pos is not None:
+            cells[start_pos] = START
+        if end_pos is not None:
+            cells[end_pos] = GOAL
+        return cls(cells, start_pos, end_pos)
+
+    @property
+    def shape(self):
+        return self.cells.shape
+
+    @property
+    def rows(self):
+        return self.cells.shape[0]
+
+    @property
+    def cols(self):
+        return self.cells.shape[1]
+
+    def in_bounds(self, pos):
+        return 0 <= pos[0] < self.cells.shape[0] and 0 <= pos[1] < self.cells.shape[1]
+
+    def is_passable(self, pos):
+        """
+        Ô có thể đi qua: mọi ô không phải chướng ngại vật (kể cả '*' và '#')
+        """
+        return self.in_bounds(pos) and self.cells[pos] != OBSTACLE
+
+    def passable(self):
+        """
+        Mặt nạ bool các ô có thể đi qua
+        """
+        return self.cells != OBSTACLE
+
+    def passable_flat(self):
+        """
+        Các ô có thể đi qua dưới dạng bytes phẳng (chỉ số i * cols + j),
+        dùng trong các vòng lặp nóng vì đọc bytes nhanh hơn đọc mảng NumPy.
+        Kết quả được lưu lại, nên không sửa cells sau khi đã gọi hàm này.
+        """
+        if self._passable_flat is None:
+            self._passable_flat = self.passable().tobytes()
+        return self._passable_flat
+
+    def adjacency(self):
+        """
+        Danh sách kề dạng CSR trên chỉ số phẳng i * cols + j
+        Các ô có thể đi qua kề với ô node (4 hướng, theo thứ tự lên, xuống, trái,
+        phải) là targets[offsets[node]:offsets[node + 1]], nên vòng lặp nóng
+        không còn kiểm tra biên, kiểm tra chướng ngại vật hay tạo tuple.
+        Được tính một lần bằng NumPy và lưu lại như passable_flat.
+        Trả về: (offsets, targets) kiểu array
+        """
+        if self._adjacency is None:
+            self._adjacency = _build_adjacency(self.passable())
+        return self._adjacency
+
+    def free_count(self):
+        """
+        Số ô có thể đi qua
+        """
+        return int(np.count_nonzero(self.cells != OBSTACLE))
+
+    def to_char_array(self):
+        """
+        Mảng ký tự ('0', '1', '*', '#') để in hoặc đánh dấu đường đi
+        """
+        return CODE_TO_CHAR[self.cells]
+
+    def to_string(self):
+        """
+        Chuỗi bản đồ theo định dạng của map_generate.map_to_string
+        """
+        return "".join(" ".join(row) + "\n" for row in self.to_char_array())
+
+
+# (dy, dx) theo thứ tự hàng xóm của danh sách kề: lên, xuống, trái, phải
+_NEIGHBOR_STEPS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+
+def _build_adjacency(passable):
+    """
+    offsets / targets được cấp phát thẳng bằng array và ghi qua view np.frombuffer.
+    Mỗi hướng được đọc từ một lát cắt của mặt nạ có viền (1 byte / ô) và điền
+    theo từng khối hàng, nên không có mảng trung gian (rows, cols, 4) hay bản sao
+    NumPy -> array (5000 x 5000: đỉnh ~520 MB thay vì ~1.4 GB).
+    """
+    passable = np.asarray(passable, dtype=bool)
+    rows, cols = passable.shape
+    size = rows * cols
+    dtype, typecode = (np.int32, 'i') if 4 * size < 2 ** 31 else (np.int64, 'q')
+
+    padded = np.zeros((rows + 2, cols + 2), dtype=bool)
+    padded[1:-1, 1:-1] = passable
+
+    # Số hàng xóm đi được của từng ô, cộng dồn tại chỗ thành offsets
+    offsets_array = array(typecode, [0]) * (size + 1)
+    offsets = np.frombuffer(offsets_array, dtype=dtype)
+    count = offsets[1:].reshape(rows, cols)
+    for dy, dx in _NEIGHBOR_STEPS:
+        count += padded[1 + dy:rows + 1 + dy, 1 + dx:cols + 1 + dx]
+    np.cumsum(offsets, out=offsets)
+
+    # fill: vị trí ghi kế tiếp trong targets của từng ô
+    targets_array = array(typecode, [0]) * int(offsets[-1])
+    targets = np.frombuffer(targets_array, dtype=dtype)
+    fill = offsets[:-1].copy()
+    block = max(1, 2 ** 16 // max(cols, 1))
+    for top in range(0, rows, block):
+        bottom = min(top + block, rows)
+        for dy, dx in _NEIGHBOR_STEPS:
+            mask = padded[top + 1 + dy:bottom + 1 + dy, 1 + dx:cols + 1 + dx]
+            cells = np.flatnonzero(mask) + top * cols
+            targets[fill[cells]] = cells + (dy * cols + dx)
+            fill[cells] += 1
+    return offsets_array, targets_array
+
+
+def _find_code(cells, code):
+    positions = np.argwhere(cells == code)
+    if len(positions) == 0:
+        return None
+    return tuple(int(v) for v in positions[0])
+
+
+def _parse_row(line):
+    """
+    Chuyển một dòng văn bản thành mảng mã ô, None nếu là dòng trống
+    """
+    if isinstance(line, str):
+        line = line.encode('ascii')
+    tokens = line.translate(None, b' \t\r\n')
+    if not tokens:
+        return None
+    row = _CHAR_TO_CODE[np.frombuffer(tokens, dtype=np.uint8)]
+    if np.any(row == 255):
+        raise ValueError("Map contains cells other than '0', '1', '*' and '#'")
+    return row
+
+
+def parse_grid(lines):
+    """
+    Đọc bản đồ dạng văn bản (mỗi dòng là các ký tự 0/1/*/# cách nhau bởi khoảng trắng)
+    lines: các dòng dạng str hoặc bytes
+    """
+    rows = []
+    for line in lines:
+        row = _parse_row(line)
+        if row is not None:
+            rows.append(row)
+
+    if not rows:
+        raise ValueError("Map is empty")
+    if any(len(row) != len(rows[0]) for row in rows):
+        raise ValueError("All map rows must have the same number of cells")
+
+    return Grid(np.vstack(rows))
+
+
+def read_grid(filename, mode='r'):
+    """
+    Đọc bản đồ từ file thành Grid
+    Tự nhận diện định dạng nhị phân (xem save_grid_binary), còn lại là định dạng văn bản
+    mode: chế độ np.memmap khi file là nhị phân ('r', 'r+' hoặc 'c')
+    """
+    with open(filename, 'rb') as file:
+        if file.read(len(BINARY_MAGIC)) == BINARY_MAGIC:
+            return open_grid_binary(filename, mode)
+        file.seek(0)
+        return parse_grid(file)
+
+
+# Định dạng nhị phân: header 32 byte (little-endian) rồi đến mặt phẳng ô
+#   magic 'GRDB', version, packing, 2 byte dự phòng,
+#   rows, cols (uint32), start_r, start_c, goal_r, goal_c (int32, -1 nếu không có)
+# packing = PACK_UINT8: mỗi ô 1 byte mã FREE/OBSTACLE/START/GOAL, mở bằng np.memmap không sao chép
+# packing = PACK_BITS: mỗi hàng là np.packbits của mặt nạ chướng ngại vật (ceil(cols / 8) byte)
+BINARY_MAGIC = b'GRDB'
+BINARY_VERSION = 1
+PACK_UINT8 = 0
+PACK_BITS = 1
+_HEADER = struct.Struct('<4sBBxxIIiiii')
+
+# Số hàng xử lý mỗi lần khi chép hoặc chuyển đổi để không nạp cả bản đồ lớn vào bộ nhớ
+_CHUNK_ROWS = 1024
+
+
+def _pack_header(rows, cols, start, goal, packing):
+    start = start if start is not None else (-1, -1)
+    goal = goal if goal is not None else (-1, -1)
+    return _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, packing, rows, cols,
+                        start[0], start[1], goal[0], goal[1])
+
+
+def read_binary_header(filename):
+    """
+    Đọc header của file bản đồ nhị phân
+    Trả về: (rows, cols, start, goal, packing)
+    """
+    with open(filename, 'rb') as file:
+        data = file.read(_HEADER.size)
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{filename} is too short to be a binary map")
+
+    magic, version, packing, rows, cols, sr, sc, gr, gc = _HEADER.unpack(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{filename} is not a binary map")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary map version {version}")
+    if packing not in (PACK_UINT8, PACK_BITS):
+        raise ValueError(f"Unknown binary map packing {packing}")
+
+    start = (sr, sc) if sr >= 0 else None
+    goal = (gr, gc) if gr >= 0 else None
+    return rows, cols, start, goal, packing
+
+
+def save_grid_binary(grid, filename, packed=False):
+    """
+    Ghi Grid ra file nhị phân
+    packed: True để nén bit mặt nạ chướng ngại vật (nhỏ hơn 8 lần nhưng không memmap trực tiếp được)
+    """
+    rows, cols = grid.shape
+    packing = PACK_BITS if packed else PACK_UINT8
+
+    with open(filename, 'wb') as file:
+        file.write(_pack_header(rows, cols, grid.start, grid.goal, packing))
+        for r in range(0, rows, _CHUNK_ROWS):
+            block = np.asarray(grid.cells[r:r + _CHUNK_ROWS])
+            if packed:
+                block = np.packbits(block == OBSTACLE, axis=1)
+            file.write(block.astype(np.uint8, copy=False).tobytes())
+
+    return filename
+
+
+def open_grid_binary(filename, mode='r'):
+    """
+    Mở bản đồ nhị phân thành Grid
+    Với PACK_UINT8, cells là np.memmap trên file (không sao chép, hệ điều hành
+    chỉ nạp những trang được truy cập). Với PACK_BITS, mặt phẳng bit được
+    memmap rồi giải nén theo từng khối hàng vào một mảng uint8.
+    """
+    rows, cols, start, goal, packing = read_binary_header(filename)
+
+    if packing == PACK_UINT8:
+        cells = np.memmap(filename, dtype=np.uint8, mode=mode,
+                          offset=_HEADER.size, shape=(rows, cols))
+        return Grid(cells, start, goal)
+
+    row_bytes = (cols + 7) // 8
+    bits = np.memmap(filename, dtype=np.uint8, mode='r',
+                     offset=_HEADER.size, shape=(rows, row_bytes))
+    cells = np.empty((rows, cols), dtype=np.uint8)
+    for r in range(0, rows, _CHUNK_ROWS):
+        cells[r:r + _CHUNK_ROWS] = np.unpackbits(bits[r:r + _CHUNK_ROWS], axis=1, count=cols)
+    if start is not None:
+        cells[start] = START
+    if goal is not None:
+        cells[goal] = GOAL
+    return Grid(cells, start, goal)
+
+
+def text_to_binary(text_filename, binary_filename, packed=False):
+    """
+    Chuyển bản đồ văn bản (định dạng của map_generate.save_map_to_file) sang nhị phân
+    Đọc và ghi từng dòng nên không cần nạp cả bản đồ vào bộ nhớ
+    """
+    rows, cols = 0, None
+    start, goal = None, None
+
+    with open(text_filename, 'rb') as src, open(binary_filename, 'wb') as dst:
+        # Ghi header tạm, cập nhật lại khi đã biết kích thước
+        dst.write(_pack_header(0, 0, None, None, PACK_UINT8))
+        for line in src:
+            row = _parse_row(line)
+            if row is None:
+                continue
+            if cols is None:
+                cols = len(row)
+            elif len(row) != cols:
+                raise ValueError("All map rows must have the same number of cells")
+
+            if start is None and START in row:
+                start = (rows, int(np.argmax(row == START)))
+            if goal is None and GOAL in row:
+                goal = (rows, int(np.argmax(row == GOAL)))
+
+            if packed:
+                row = np.packbits(row == OBSTACLE)
+            dst.write(row.tobytes())
+            rows += 1
+
+        if cols is None:
+            raise ValueError("Map is empty")
+        dst.seek(0)
+        dst.write(_pack_header(rows, cols, start, goal, PACK_BITS if packed else PACK_UINT8))
+
+    return binary_filename
+
+
+def write_grid_text(grid, filename):
+    """
+    Ghi Grid ra file văn bản theo định dạng của map_generate.map_to_string
+    Mỗi khối hàng được dựng bằng NumPy nên không tạo chuỗi cho từng ô
+    """
+    rows, cols = grid.shape
+    char_codes = np.frombuffer(''.join(CODE_TO_CHAR).encode('ascii'), dtype=np.uint8)
+
+    with open(filename, 'wb') as file:
+        for r in range(0, rows, _CHUNK_ROWS):
+            block = np.asarray(grid.cells[r:r + _CHUNK_ROWS])
+            # Mỗi hàng: ký tự xen kẽ khoảng trắng, ký tự cuối là xuống dòng
+            out = np.full((len(block), 2 * cols), ord(' '), dtype=np.uint8)
+            out[:, 0::2] = char_codes[block]
+            out[:, -1] = ord('\n')
+            file.write(out.tobytes())
+
+    return filename
+
+
+def binary_to_text(binary_filename, text_filename):
+    """
+    Chuyển bản đồ nhị phân về định dạng văn bản của map_generate.save_map_to_file
+    """
+    return write_grid_text(open_grid_binary(binary_filename), text_filename)
+
+
+def main():
+    """
+    Chuyển đổi giữa định dạng văn bản và nhị phân:
+    python grid.py input_map.txt input_map.grd [--packed]
+    python grid.py input_map.grd input_map.txt
+    """
+    args = [arg for arg in sys.argv[1:] if arg != '--packed']
+    if len(args) != 2:
+        print("Usage: python grid.py SOURCE DEST [--packed]")
+        return
+
+    source, dest = args
+    with open(source, 'rb') as file:
+        is_binary = file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+    if is_binary:
+        binary_to_text(source, dest)
+    else:
+        text_to_binary(source, dest, packed='--packed' in sys.argv[1:])
+    print(f"Map written: {dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import time
+from collections import Counter
+
+import numpy as np
+
+
+class PlannerStats:
+    """
+    Số liệu đo của một lần lập đường (bật bằng cách truyền stats=PlannerStats())
+    Các planner chỉ ghi vào đây ở những điểm thưa (mỗi lần tìm kiếm, đầu / cuối
+    mỗi giai đoạn); các bộ đếm trong vòng lặp chính được suy ra từ trạng thái cuối,
+    nên khi stats=None vòng lặp nóng không có thêm lệnh nào.
+    counters: bộ đếm theo tên (expansions, heap_pushes, heap_pops, searches, ...)
+    timings: tổng thời gian (giây) theo giai đoạn
+    search_sizes: số ô được duyệt của từng lần tìm kiếm (BFS / A* / JPS)
+    """
+
+    def __init__(self):
+        self.counters = Counter()
+        self.timings = {}
+        self.search_sizes = []
+        self._started = {}
+
+    def add(self, name, value=1):
+        self.counters[name] += value
+
+    def start(self, phase):
+        self._started[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        elapsed = time.perf_counter() - self._started.pop(phase)
+        self.timings[phase] = self.timings.get(phase, 0.0) + elapsed
+
+    def timed(self, phase, func, *args):
+        """
+        Gọi func(*args) và cộng thời gian chạy vào giai đoạn phase
+        """
+        self.start(phase)
+        try:
+            return func(*args)
+        finally:
+            self.stop(phase)
+
+    def record_search(self, workspace):
+        """
+        Ghi một lần tìm kiếm vừa chạy trên workspace (shortest_path.BfsWorkspace):
+        số ô BFS đã lấy ra khỏi hàng đợi / số nút A*, JPS đã mở rộng (workspace.expanded)
+        """
+        size = workspace.expanded
+        self.counters['searches'] += 1
+        self.counters['search_expansions'] += size
+        self.search_sizes.append(size)
+
+    def as_dict(self):
+        sizes = self.search_sizes
+        return {
+            'counters': dict(self.counters),
+            'timings': dict(self.timings),
+            'searches': {
+                'count': len(sizes),
+                'total': int(sum(sizes)),
+                'max': max(sizes, default=0),
+                'mean': float(np.mean(sizes)) if sizes else 0.0,
+            },
+        }
+
+    def report(self):
+        lines = [f"{name:<20}{value:>14}" for name, value in sorted(self.counters.items())]
+        lines += [f"{name:<20}{seconds * 1000:>11.1f} ms" for name, seconds in sorted(self.timings.items())]
+        if self.search_sizes:
+            lines.append(f"{'search size max':<20}{max(self.search_sizes):>14}")
+            lines.append(f"{'search size mean':<20}{np.mean(self.search_sizes):>14.1f}")
+        return "\n".join(lines)
+
+
+def profile_call(func, *args, profile_file=None, sort='cumulative', limit=20, **kwargs):
+    """
+    Chạy func(*args, **kwargs) dưới cProfile
+    profile_file: nếu có, ghi kết quả thô (đọc lại bằng pstats / snakeviz);
+    nếu không, in limit dòng tốn thời gian nhất
+    Trả về: giá trị trả về của func
+    """
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if profile_file is not None:
+            profiler.dump_stats(profile_file)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
+
+
+def main():
+    from grid import read_grid
+    from solution_A import a_star_coverage
+    from waypoint_gpt import refined_coverage_path_planning
+
+    parser = argparse.ArgumentParser(description="Run a planner on a map file and print its stats")
+    parser.add_argument("map_file", nargs="?", default="input_map.txt")
+    parser.add_argument("--planner", choices=["gpt", "a_star"], default="gpt")
+    parser.add_argument("--backtrack", choices=["stack", "bfs"], default="stack")
+    parser.add_argument("--profile", default=None, help="also run under cProfile and dump to this file")
+    args = parser.parse_args()
+
+    grid = read_grid(args.map_file)
+    stats = PlannerStats()
+    if args.planner == "gpt":
+        plan, kwargs = refined_coverage_path_planning, {'backtrack': args.backtrack, 'stats': stats}
+    else:
+        plan, kwargs = a_star_coverage, {'stats': stats}
+
+    if args.profile:
+        profile_call(plan, grid, grid.start, profile_file=args.profile, **kwargs)
+        print(f"Profile written: {args.profile}")
+    else:
+        plan(grid, grid.start, **kwargs)
+    print(stats.report())
+
+
+if __name__ == "__main__":
+    main()
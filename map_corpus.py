@@ -0,0 +1,126 @@
+import argparse
+import csv
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grid import Grid, save_grid_binary
+from map_generate import create_square_map, save_map_to_file
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = ['index', 'file', 'size', 'obstacle_ratio', 'seed', 'free_cells', 'sha256']
+
+
+def corpus_jobs(count, sizes, ratios, master_seed):
+    """
+    Danh sách công việc tạo bản đồ, xác định hoàn toàn bởi master_seed
+    Bản đồ thứ i lấy cặp (size, ratio) thứ i % số cặp, và seed riêng được
+    sinh từ np.random.SeedSequence(master_seed).spawn(count)[i]
+    """
+    combos = [(size, ratio) for size in sizes for ratio in ratios]
+    children = np.random.SeedSequence(master_seed).spawn(count)
+    jobs = []
+    for index, child in enumerate(children):
+        size, ratio = combos[index % len(combos)]
+        seed = int(child.generate_state(1, dtype=np.uint64)[0])
+        jobs.append((index, size, ratio, seed))
+    return jobs
+
+
+def _file_sha256(filename):
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def generate_corpus_map(job, out_dir, binary=False):
+    """
+    Tạo và ghi một bản đồ của corpus
+    Trả về: một dòng manifest (dict)
+    """
+    index, size, ratio, seed = job
+    map_grid, start_pos, end_pos = create_square_map(size, ratio, seed=seed)
+
+    extension = "grd" if binary else "txt"
+    name = f"map_{index:06d}_{size}_{ratio:g}.{extension}"
+    path = os.path.join(out_dir, name)
+    if binary:
+        save_grid_binary(Grid.from_array(map_grid, start_pos, end_pos), path)
+    else:
+        save_map_to_file(map_grid, size, start_pos, end_pos, filename=path)
+
+    return {
+        'index': index,
+        'file': name,
+        'size': size,
+        'obstacle_ratio': ratio,
+        'seed': seed,
+        'free_cells': int(np.count_nonzero(map_grid == 0)),
+        'sha256': _file_sha256(path),
+    }
+
+
+def _generate_job(args):
+    return generate_corpus_map(*args)
+
+
+def generate_corpus(out_dir, count, sizes, ratios, master_seed=0, workers=None, binary=False):
+    """
+    Tạo count bản đồ vào out_dir bằng nhiều tiến trình và ghi manifest.csv
+    Cùng master_seed, sizes, ratios luôn cho ra cùng các bản đồ (cùng sha256),
+    không phụ thuộc số tiến trình.
+    workers: số tiến trình (None: số CPU)
+    Trả về: danh sách dòng manifest theo thứ tự index
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = corpus_jobs(count, sizes, ratios, master_seed)
+    tasks = [(job, out_dir, binary) for job in jobs]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        rows = list(executor.map(_generate_job, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=MANIFEST_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    return rows
+
+
+def read_manifest(out_dir):
+    """
+    Đọc manifest.csv của corpus
+    """
+    with open(os.path.join(out_dir, MANIFEST_NAME), newline='') as file:
+        rows = list(csv.DictReader(file))
+    for row in rows:
+        row['index'] = int(row['index'])
+        row['size'] = int(row['size'])
+        row['obstacle_ratio'] = float(row['obstacle_ratio'])
+        row['seed'] = int(row['seed'])
+        row['free_cells'] = int(row['free_cells'])
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a reproducible corpus of maps")
+    parser.add_argument("out_dir")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[19])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--binary", action="store_true", help="write binary .grd maps")
+    args = parser.parse_args()
+
+    rows = generate_corpus(args.out_dir, args.count, args.sizes, args.ratios,
+                           args.seed, args.workers, args.binary)
+    print(f"{len(rows)} maps written to {args.out_dir} ({MANIFEST_NAME})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,33 @@
+import heapq
 import numpy as np
-import matplotlib.pyplot as plt
-import os
 import time
-import random
-from collections import deque
-from dotenv import load_dotenv
-from google import genai
 
-load_dotenv()
+from grid import Grid, write_grid_text
+from shortest_path import find_path
 
-def create_square_map(size, obstacle_ratio=0.2, max_attempts=50):
+def place_obstacles(size, num_obstacles, rng):
+    """
+    Đặt ngẫu nhiên num_obstacles chướng ngại vật, tránh điểm bắt đầu (0, 0)
+    và điểm kết thúc (size-1, size-1)
+    Chọn trên chỉ số phẳng 1..size*size-2 bằng np.random.Generator rồi gán
+    bằng fancy indexing, không tạo danh sách tuple cho từng ô.
+    """
+    map_grid = np.zeros((size, size), dtype=np.uint8)
+    inner_cells = max(size * size - 2, 0)
+    num_obstacles = max(min(num_obstacles, inner_cells), 0)
+    obstacle_positions = rng.choice(inner_cells, num_obstacles, replace=False) + 1
+    map_grid.ravel()[obstacle_positions] = 1
+    return map_grid
+
+def create_square_map(size, obstacle_ratio=0.2, max_attempts=50, min_reachable_ratio=None, seed=None):
     """
     Tạo bản đồ hình vuông với kích thước size x size và thêm chướng ngại vật
     size: kích thước bản đồ (n x n)
     obstacle_ratio: tỷ lệ ô bị chặn (từ 0 đến 1)
     max_attempts: số lần thử tối đa để tạo bản đồ hợp lệ
+    min_reachable_ratio: nếu có, chỉ nhận bản đồ mà vùng đi tới được từ điểm
+        xuất phát chiếm ít nhất tỷ lệ này trong số ô trống (để bao phủ được)
+    seed: số nguyên hoặc np.random.Generator để tạo lại đúng bản đồ (None: ngẫu nhiên)
     
     Trả về: Ma trận bản đồ với 0 là ô trống và 1 là chướng ngại vật
     """
@@ -26,95 +39,165 @@ def create_square_map(size, obstacle_ratio=0.2, max_attempts=50):
     # Điểm bắt đầu và kết thúc cố định
     start_pos = (0, 0)
     end_pos = (size-1, size-1)
+    rng = np.random.default_rng(seed)
+    
+    # Tính số chướng ngại vật cần đặt, để lại ít nhất một ô trống ngoài start & end
+    num_obstacles = min(int(size * size * obstacle_ratio), size * size - 3)
     
     for attempt in range(max_attempts):
-        # Tạo bản đồ trống
-        map_grid = np.zeros((size, size), dtype=int)
-        
-        # Đảm bảo điểm bắt đầu (0,0) và điểm kết thúc (size-1, size-1) không có chướng ngại vật
-        valid_indices = [(r, c) for r in range(size) for c in range(size) 
-                         if (r, c) != start_pos and (r, c) != end_pos]
-        
-        # Tính số chướng ngại vật cần đặt
-        num_obstacles = int(size * size * obstacle_ratio)
-        
-        # Đảm bảo không đặt quá nhiều chướng ngại vật
-        num_obstacles = min(num_obstacles, len(valid_indices) - 1)
-        
-        # Chọn ngẫu nhiên vị trí để đặt chướng ngại vật (không bao gồm start & end)
-        obstacle_positions = random.sample(valid_indices, num_obstacles)
-        
-        # Đặt chướng ngại vật vào bản đồ
-        for r, c in obstacle_positions:
-            map_grid[r, c] = 1
+        # Đặt chướng ngại vật (không bao gồm start & end)
+        map_grid = place_obstacles(size, num_obstacles, rng)
         
         # Kiểm tra xem có đường đi từ điểm xuất phát đến điểm kết thúc hay không
-        if check_path_exists(map_grid, start_pos, end_pos):
-            return map_grid, start_pos, end_pos
+        # Chỉ gán nhãn cả bản đồ khi cần đếm vùng đi tới được (min_reachable_ratio)
+        if min_reachable_ratio is None:
+            connected = check_path_exists(map_grid, start_pos, end_pos)
+        else:
+            region, reachable_cells = reachable_region(map_grid, start_pos)
+            connected = bool(region[end_pos])
+        if not connected:
+            # Nếu không tìm thấy đường đi, thử lại với bản đồ mới
+            print(f"Try {attempt + 1}: Not valid path from start to end.")
+            continue
+        
+        # Kiểm tra tỷ lệ ô trống có thể bao phủ từ điểm xuất phát
+        free_cells = size * size - num_obstacles
+        if min_reachable_ratio is not None and reachable_cells < min_reachable_ratio * free_cells:
+            print(f"Try {attempt + 1}: Only {reachable_cells}/{free_cells} free cells reachable from start.")
+            continue
         
-        # Nếu không tìm thấy đường đi, thử lại với bản đồ mới
-        print(f"Try {attempt + 1}: Not valid path from start to end.")
+        return map_grid, start_pos, end_pos
     
     # Nếu đã thử nhiều lần mà không thành công, giảm tỷ lệ chướng ngại vật và thông báo
     print(f"Can not generate after {max_attempts} attempts with obstacle ratio {obstacle_ratio:.2f}.")
     print("Creating an almost empty map to ensure a valid path exists.")
     
     # Tạo một bản đồ gần như trống để đảm bảo có đường đi
-    map_grid = np.zeros((size, size), dtype=int)
-    
     # Thêm một số ít chướng ngại vật (5%) nhưng tránh start và end
     min_obstacle_ratio = 0.05
-    valid_indices = [(r, c) for r in range(size) for c in range(size) 
-                    if (r, c) != start_pos and (r, c) != end_pos]
-    
-    min_obstacles = int(min(size * size * min_obstacle_ratio, len(valid_indices) * 0.5))
-    obstacle_positions = random.sample(valid_indices, min_obstacles)
-    
-    for r, c in obstacle_positions:
-        map_grid[r, c] = 1
+    min_obstacles = int(min(size * size * min_obstacle_ratio, (size * size - 2) * 0.5))
+    map_grid = place_obstacles(size, min_obstacles, rng)
     
     # Đảm bảo có đường đi
     if not check_path_exists(map_grid, start_pos, end_pos):
         # Nếu vẫn không có đường đi, tạo bản đồ hoàn toàn trống
-        map_grid = np.zeros((size, size), dtype=int)
+        map_grid = np.zeros((size, size), dtype=np.uint8)
     
     return map_grid, start_pos, end_pos
 
-def check_path_exists(map_grid, start_pos, end_pos):
+def label_components(map_grid):
     """
-    Kiểm tra xem có đường đi từ điểm xuất phát đến điểm kết thúc hay không
-    Sử dụng thuật toán BFS (Breadth-First Search)
+    Gán nhãn thành phần liên thông (4 hướng) cho các ô trống bằng NumPy
+    Bước 1: gộp các ô trống liên tiếp trên cùng hàng thành một đoạn (run).
+    Bước 2: mỗi vòng lặp nối gốc của hai đoạn kề nhau theo chiều dọc về gốc
+    có chỉ số nhỏ hơn rồi nén đường dẫn (pointer jumping); các cạnh đã cùng
+    gốc được bỏ khỏi vòng sau. Chỉ cần vài vòng vector hóa thay vì duyệt
+    từng ô bằng Python.
+    Trả về: mảng nhãn cùng kích thước bản đồ, -1 tại chướng ngại vật
     """
-    rows, cols = map_grid.shape
-    visited = np.zeros((rows, cols), dtype=bool)
+    free = np.asarray(map_grid) == 0
+    rows, cols = free.shape
+    if not free.any():
+        return np.full((rows, cols), -1, dtype=np.int64)
+    index_type = np.int32 if rows * cols < 2 ** 31 else np.int64
     
-    # Các hướng di chuyển: lên, xuống, trái, phải
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    # Đánh số các đoạn ô trống theo hàng
+    run_starts = free.copy()
+    run_starts[:, 1:] &= ~free[:, :-1]
+    run_id = np.cumsum(run_starts.ravel(), dtype=index_type) - 1
     
-    # Hàng đợi để BFS
-    queue = deque([start_pos])
-    visited[start_pos] = True
+    # Cạnh giữa hai đoạn ở hai hàng liền kề (bỏ các cạnh trùng liên tiếp)
+    below = np.flatnonzero(free[:-1, :] & free[1:, :])
+    edge_u = run_id[below]
+    edge_v = run_id[below + cols]
+    keep = np.ones(len(edge_u), dtype=bool)
+    keep[1:] = (edge_u[1:] != edge_u[:-1]) | (edge_v[1:] != edge_v[:-1])
+    edge_u, edge_v = edge_u[keep], edge_v[keep]
     
-    while queue:
-        row, col = queue.popleft()
+    labels = np.arange(int(run_id[-1]) + 1, dtype=index_type)
+    while len(edge_u):
+        root_u = labels[edge_u]
+        root_v = labels[edge_v]
+        
+        # Chỉ giữ các cạnh nối hai cây khác nhau
+        differ = root_u != root_v
+        edge_u, edge_v = edge_u[differ], edge_v[differ]
+        if not len(edge_u):
+            break
+        root_u, root_v = root_u[differ], root_v[differ]
         
-        # Nếu đã đến điểm kết thúc
-        if (row, col) == end_pos:
+        # Nối gốc lớn hơn vào một gốc nhỏ hơn, rồi nén để mọi đoạn trỏ thẳng tới gốc
+        labels[np.maximum(root_u, root_v)] = np.minimum(root_u, root_v)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+    
+    return np.where(free.ravel(), labels[run_id], -1).reshape(rows, cols)
+
+def reachable_region(map_grid, start_pos):
+    """
+    Vùng ô trống đi tới được từ start_pos
+    Trả về: (mặt nạ bool của vùng, số ô trong vùng)
+    """
+    labels = label_components(map_grid)
+    if labels[start_pos] < 0:
+        return np.zeros(labels.shape, dtype=bool), 0
+    region = labels == labels[start_pos]
+    return region, int(np.count_nonzero(region))
+
+def _greedy_reach(free, cols, source, target, limit):
+    """
+    Tìm kiếm tham lam (best-first theo khoảng cách Manhattan tới đích) trên mặt
+    nạ ô trống phẳng free, chỉ để biết target có tới được từ source hay không
+    Trả về True / False, hoặc None nếu đã lấy ra quá limit ô mà chưa kết luận
+    """
+    size = len(free)
+    ty, tx = divmod(target, cols)
+    seen = bytearray(size)
+    seen[source] = 1
+    heap = [(0, source)]
+    pops = 0
+    while heap:
+        _, node = heapq.heappop(heap)
+        if node == target:
             return True
+        pops += 1
+        if pops > limit:
+            return None
         
-        # Thử các hướng di chuyển
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            
-            # Kiểm tra xem vị trí mới có hợp lệ không
-            if (0 <= new_row < rows and 0 <= new_col < cols and 
-                not visited[new_row, new_col] and map_grid[new_row, new_col] == 0):
-                queue.append((new_row, new_col))
-                visited[new_row, new_col] = True
-    
-    # Nếu không tìm thấy đường đi
+        y, x = divmod(node, cols)
+        for nxt, ny, nx in ((node - cols, y - 1, x), (node + cols, y + 1, x),
+                            (node - 1, y, x - 1), (node + 1, y, x + 1)):
+            if 0 <= nxt < size and ny == nxt // cols and free[nxt] and not seen[nxt]:
+                seen[nxt] = 1
+                heapq.heappush(heap, (abs(ty - ny) + abs(tx - nx), nxt))
     return False
 
+def check_path_exists(map_grid, start_pos, end_pos):
+    """
+    Kiểm tra xem có đường đi từ điểm xuất phát đến điểm kết thúc hay không
+    Thử tìm kiếm tham lam có giới hạn từ start rồi từ end: khi có đường, hoặc khi
+    một đầu bị vây trong vùng nhỏ, kết luận được sau vài lần (rows + cols) ô.
+    Chỉ khi cả hai lần đều vượt giới hạn mới gán nhãn cả bản đồ (label_components).
+    """
+    map_grid = np.asarray(map_grid)
+    rows, cols = map_grid.shape
+    free = (map_grid == 0).ravel().tobytes()
+    source = start_pos[0] * cols + start_pos[1]
+    target = end_pos[0] * cols + end_pos[1]
+    if not (free[source] and free[target]):
+        return False
+    limit = max(4096, 8 * (rows + cols))
+    for a, b in ((source, target), (target, source)):
+        reached = _greedy_reach(free, cols, a, b, limit)
+        if reached is not None:
+            return reached
+    
+    labels = label_components(map_grid)
+    return labels[start_pos] >= 0 and labels[start_pos] == labels[end_pos]
+
 def visualize_map(map_grid, start_pos, end_pos, path=None):
     """
     Hiển thị bản đồ bằng matplotlib
@@ -122,7 +205,10 @@ def visualize_map(map_grid, start_pos, end_pos, path=None):
     1: chướng ngại vật (đen)
     *: điểm xuất phát (đỏ)
     #: điểm kết thúc (xanh lá)
+    matplotlib chỉ được import khi vẽ
     """
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(6, 6))
     plt.imshow(map_grid, cmap='binary')
 
@@ -164,63 +250,20 @@ def map_to_string(map_grid, start_pos, end_pos):
         map_str += " ".join(row_str) + "\n"
     return map_str
 
-def save_map_to_file(map_grid, size, start_pos, end_pos):
+def save_map_to_file(map_grid, size, start_pos, end_pos, filename="input_map.txt"):
     """
-    Lưu bản đồ vào file txt
+    Lưu bản đồ vào file txt (cùng định dạng với map_to_string)
     """
-    filename = f"input_map.txt"
-    
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write(map_to_string(map_grid, start_pos, end_pos))
+    write_grid_text(Grid.from_array(map_grid, start_pos, end_pos), filename)
     
     return filename, time.strftime("%Y%m%d_%H%M%S")
 
-def find_shortest_path(map_grid, start_pos, end_pos):
+def find_shortest_path(map_grid, start_pos, end_pos, method='bfs'):
     """
     Tìm đường đi ngắn nhất từ điểm xuất phát đến điểm kết thúc
-    Sử dụng thuật toán BFS (Breadth-First Search)
+    method: 'bfs', 'astar' hoặc 'jps' (xem shortest_path.find_path)
     """
-    rows, cols = map_grid.shape
-    visited = np.zeros((rows, cols), dtype=bool)
-    
-    # Các hướng di chuyển: lên, xuống, trái, phải
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-    
-    # Hàng đợi để BFS
-    queue = deque([start_pos])
-    visited[start_pos] = True
-    
-    # Lưu lại đường đi
-    parent = {}
-    
-    while queue:
-        row, col = queue.popleft()
-        
-        # Nếu đã đến điểm kết thúc
-        if (row, col) == end_pos:
-            # Khôi phục đường đi
-            path = []
-            current = end_pos
-            while current != start_pos:
-                path.append(current)
-                current = parent[current]
-            path.append(start_pos)
-            path.reverse()
-            return path
-        
-        # Thử các hướng di chuyển
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            
-            # Kiểm tra xem vị trí mới có hợp lệ không
-            if (0 <= new_row < rows and 0 <= new_col < cols and 
-                not visited[new_row, new_col] and map_grid[new_row, new_col] == 0):
-                queue.append((new_row, new_col))
-                visited[new_row, new_col] = True
-                parent[(new_row, new_col)] = (row, col)
-    
-    # Nếu không tìm thấy đường đi
-    return None
+    return find_path(Grid.from_array(map_grid, start_pos, end_pos), start_pos, end_pos, method)
 
 def main():
     """
@@ -0,0 +1,152 @@
+import argparse
+import heapq
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from distance_field import distance_field
+from grid import FREE, OBSTACLE, START, Grid, read_grid
+from waypoint_evaluation import evaluate_multi_robot
+from waypoint_io import write_waypoints_text
+
+
+def spread_starts(grid, count, first=None):
+    """
+    Chọn count điểm xuất phát cách xa nhau (farthest point sampling theo khoảng cách BFS)
+    first: điểm đầu tiên (mặc định là '*' của bản đồ)
+    Trả về: danh sách (hàng, cột)
+    """
+    if count < 1:
+        raise ValueError("at least one robot is required")
+    starts = [first if first is not None else grid.start]
+    while len(starts) < count:
+        dist = distance_field(grid, starts)
+        node = int(np.argmax(dist))
+        if dist[node] <= 0:
+            raise ValueError(f"Only {len(starts)} distinct cells reachable for {count} robots")
+        starts.append(divmod(node, grid.cols))
+    return starts
+
+
+def partition_regions(grid, starts):
+    """
+    Chia các ô đi được thành một vùng liên thông cho mỗi robot
+    BFS nhiều nguồn với tốc độ lớn cân bằng: mỗi bước, vùng đang nhỏ nhất (còn
+    mở rộng được) nhận thêm ô chưa có chủ kế tiếp theo thứ tự BFS từ điểm xuất
+    phát của nó. Mỗi vùng chỉ lớn lên từ biên của chính nó nên luôn liên thông;
+    kích thước chênh lệch chỉ khi một vùng bị các vùng khác hoặc vật cản bao kín.
+    starts: danh sách (hàng, cột), mỗi robot một điểm
+    Trả về: mảng int32 (rows, cols), chỉ số robot của từng ô, -1 tại vật cản và
+    ô không tới được từ robot nào
+    """
+    if not starts:
+        raise ValueError("at least one robot start is required")
+    rows, cols = grid.shape
+    offsets, targets = grid.adjacency()
+    passable = grid.passable_flat()
+    owner = array('i', [-1]) * (rows * cols)
+    frontiers = []
+    sizes = []
+    for robot, (y, x) in enumerate(starts):
+        node = y * cols + x
+        if not passable[node]:
+            raise ValueError(f"Start {(y, x)} of robot {robot} is an obstacle")
+        if owner[node] >= 0:
+            raise ValueError(f"Robots {owner[node]} and {robot} share the start {(y, x)}")
+        owner[node] = robot
+        frontiers.append(deque([node]))
+        sizes.append(1)
+
+    heap = [(1, robot) for robot in range(len(starts))]
+    heapq.heapify(heap)
+    while heap:
+        _, robot = heapq.heappop(heap)
+        frontier = frontiers[robot]
+        claimed = -1
+        while frontier and claimed < 0:
+            node = frontier[0]
+            for nxt in targets[offsets[node]:offsets[node + 1]]:
+                if owner[nxt] < 0:
+                    claimed = nxt
+                    break
+            else:
+                frontier.popleft()  # Mọi ô kề đã có chủ
+        if claimed < 0:
+            continue  # Vùng bị bao kín, không lớn thêm được
+
+        owner[claimed] = robot
+        frontier.append(claimed)
+        sizes[robot] += 1
+        heapq.heappush(heap, (sizes[robot], robot))
+
+    return np.frombuffer(owner, dtype=np.int32).reshape(rows, cols).copy()
+
+
+def region_grid(grid, labels, robot, start):
+    """
+    Bản đồ riêng của một robot: ô ngoài vùng của nó thành vật cản
+    """
+    cells = np.where(labels == robot, FREE, OBSTACLE).astype(np.uint8)
+    cells[start] = START
+    return Grid(cells, start)
+
+
+def _plan_region(args):
+    from pipeline import PLANNERS
+
+    cells, start, planner = args
+    return PLANNERS[planner](Grid(cells, start), start)
+
+
+def plan_multi_robot(grid, starts, planner="gpt", workers=None):
+    """
+    Chia bản đồ thành vùng cho từng robot và lập đường bao phủ từng vùng song song
+    planner: tên trong pipeline.PLANNERS
+    workers: số tiến trình (None: số CPU, 1: chạy ngay trong tiến trình hiện tại)
+    Trả về: (labels của partition_regions, danh sách waypoint của từng robot)
+    """
+    labels = partition_regions(grid, starts)
+    tasks = [(region_grid(grid, labels, robot, start).cells, start, planner)
+             for robot, start in enumerate(starts)]
+    if workers == 1:
+        return labels, [_plan_region(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=min(workers or len(tasks), len(tasks))) as executor:
+        return labels, list(executor.map(_plan_region, tasks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plan coverage for several robots on one map")
+    parser.add_argument("map_file", nargs="?", default="input_map.txt")
+    parser.add_argument("--robots", type=int, default=2, help="robots, spread out from '*'")
+    parser.add_argument("--starts", nargs="+", default=None, metavar="Y,X",
+                        help="explicit start cells (overrides --robots)")
+    parser.add_argument("--planner", default="gpt")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="waypoint_robot_{}.txt", help="file name pattern per robot")
+    args = parser.parse_args()
+
+    grid = read_grid(args.map_file)
+    if args.starts:
+        starts = [tuple(int(value) for value in start.split(",")) for start in args.starts]
+    else:
+        starts = spread_starts(grid, args.robots)
+
+    labels, paths = plan_multi_robot(grid, starts, args.planner, args.workers)
+    for robot, path in enumerate(paths):
+        write_waypoints_text(path, args.output.format(robot))
+
+    report = evaluate_multi_robot(grid, paths, labels)
+    print(f"{'robot':>5}{'start':>12}{'region':>8}{'steps':>8}{'time':>10}{'coverage':>10}{'region cov':>12}")
+    for robot, (start, row) in enumerate(zip(starts, report['robots'])):
+        print(f"{robot:>5}{str(start):>12}{row['region_cells']:>8}{row['steps']:>8}{row['time']:>10.1f}"
+              f"{row['coverage_ratio']:>10.2%}{row['region_coverage']:>12.2%}")
+    print(f"Makespan: {report['makespan']:.1f} ({report['makespan_steps']} steps), "
+          f"coverage {report['coverage_ratio']:.2%}, overlap {report['overlap_cells']} cells, "
+          f"valid: {report['valid']}")
+
+
+if __name__ == "__main__":
+    main()
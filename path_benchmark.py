@@ -0,0 +1,70 @@
+import argparse
+import time
+
+import numpy as np
+
+from grid import Grid
+from map_generate import create_square_map, reachable_region
+from shortest_path import PATH_METHODS, BfsWorkspace, find_path
+
+
+def benchmark_map(size, ratio, seed, queries=5, repeat=3):
+    """
+    So sánh BFS / A* / JPS trên một bản đồ: góc (0, 0) -> góc đối diện và
+    queries - 1 cặp ô ngẫu nhiên trong vùng đi tới được
+    Trả về: dict method -> (tổng số nút mở rộng, thời gian tốt nhất tính bằng ms)
+    """
+    map_grid, start_pos, end_pos = create_square_map(size, ratio, seed=seed)
+    grid = Grid.from_array(map_grid, start_pos, end_pos)
+    region, _ = reachable_region(map_grid, start_pos)
+    cells = np.argwhere(region)
+    rng = np.random.default_rng(seed)
+    pairs = [(start_pos, end_pos)]
+    for _ in range(queries - 1):
+        a, b = cells[rng.integers(len(cells), size=2)]
+        pairs.append(((int(a[0]), int(a[1])), (int(b[0]), int(b[1]))))
+
+    workspace = BfsWorkspace(size * size)
+    results = {}
+    lengths = None
+    for method in PATH_METHODS:
+        expanded = 0
+        path_lengths = []
+        for start, goal in pairs:
+            path = find_path(grid, start, goal, method, workspace)
+            path_lengths.append(len(path))
+            expanded += workspace.expanded
+        if lengths is None:
+            lengths = path_lengths
+        elif path_lengths != lengths:
+            raise AssertionError(f"{method} path lengths {path_lengths} != bfs {lengths}")
+
+        best = float('inf')
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            for start, goal in pairs:
+                find_path(grid, start, goal, method, workspace)
+            best = min(best, time.perf_counter() - start_time)
+        results[method] = (expanded, best * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare BFS, A* and JPS point-to-point queries")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.05, 0.2])
+    parser.add_argument("--queries", type=int, default=5, help="queries per map (first: corner to corner)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'size':>6}{'ratio':>7}  {'method':<7}{'expanded':>12}{'ms':>10}")
+    for size in args.sizes:
+        for ratio in args.ratios:
+            results = benchmark_map(size, ratio, args.seed, args.queries, args.repeat)
+            for method, (expanded, elapsed) in results.items():
+                print(f"{size:>6}{ratio:>7g}  {method:<7}{expanded:>12}{elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
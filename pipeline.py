@@ -0,0 +1,175 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grid import Grid, write_grid_text
+from instrumentation import profile_call
+from map_generate import create_square_map
+from waypoint_evaluation import evaluate_run
+from waypoint_gpt import refined_coverage_path_planning, write_waypoints_to_file
+
+
+def plan_dfs(grid, start):
+    return refined_coverage_path_planning(grid, start)
+
+
+def plan_a_star(grid, start):
+    from solution_A import a_star_coverage
+    return a_star_coverage(grid, start)[0]
+
+
+def plan_boustrophedon(grid, start):
+    from boustrophedon import boustrophedon_coverage
+    return boustrophedon_coverage(grid, start)
+
+
+def plan_stc(grid, start):
+    from stc import stc_coverage
+    return stc_coverage(grid, start)
+
+
+# Các thuật toán lập đường bao phủ: tên -> hàm (grid, start) -> danh sách waypoint (y, x)
+PLANNERS = {
+    'gpt': plan_dfs,
+    'a_star': plan_a_star,
+    'boustrophedon': plan_boustrophedon,
+    'stc': plan_stc,
+}
+
+
+def generate_stage(size=19, obstacle_ratio=0.1, seed=None):
+    """
+    Giai đoạn tạo bản đồ: trả về Grid thay vì ghi input_map.txt
+    """
+    map_grid, start_pos, end_pos = create_square_map(size, obstacle_ratio, seed=seed)
+    return Grid.from_array(map_grid, start_pos, end_pos)
+
+
+def run_pipeline(generate, plan, evaluate=evaluate_run, checkpoint_dir=None, label="gpt", profile_file=None):
+    """
+    Chạy map -> plan -> evaluate ngay trong tiến trình hiện tại
+    generate: hàm () -> Grid
+    plan: hàm (grid, start) -> danh sách waypoint (y, x)
+    evaluate: hàm (grid, waypoints) -> dict chỉ số
+    checkpoint_dir: nếu có, ghi input_map.txt và waypoint_<label>.txt vào thư mục này
+    profile_file: nếu có, chạy plan dưới cProfile và ghi kết quả vào file này
+    Trả về: (grid, waypoints, kết quả đánh giá)
+    """
+    grid = generate()
+    if checkpoint_dir is not None:
+        os.makedirs(checkpoint_dir, exist_ok=True)
+        write_grid_text(grid, os.path.join(checkpoint_dir, "input_map.txt"))
+
+    if profile_file is None:
+        waypoints = plan(grid, grid.start)
+    else:
+        waypoints = profile_call(plan, grid, grid.start, profile_file=profile_file)
+    if checkpoint_dir is not None:
+        write_waypoints_to_file(waypoints, os.path.join(checkpoint_dir, f"waypoint_{label}.txt"))
+
+    result = evaluate(grid, waypoints)
+    return grid, waypoints, result
+
+
+def experiment_jobs(runs, sizes, ratios, planners, master_seed=0):
+    """
+    Danh sách lần chạy của một sweep planner x size x ratio x runs
+    Mỗi bản đồ (size, ratio, run) có seed riêng sinh từ
+    np.random.SeedSequence(master_seed).spawn(...); mọi planner dùng chung
+    bản đồ đó nên có thể so sánh trực tiếp.
+    Trả về: danh sách (index, run, size, ratio, planner, seed)
+    """
+    maps = [(size, ratio, run) for size in sizes for ratio in ratios for run in range(runs)]
+    children = np.random.SeedSequence(master_seed).spawn(len(maps))
+    jobs = []
+    for (size, ratio, run), child in zip(maps, children):
+        seed = int(child.generate_state(1, dtype=np.uint64)[0])
+        for planner in planners:
+            jobs.append((len(jobs), run, size, ratio, planner, seed))
+    return jobs
+
+
+def run_job(job, checkpoint_root=None, keep_waypoints=False, profile_root=None):
+    """
+    Chạy một lần pipeline của sweep
+    checkpoint_root: nếu có, file của lần chạy được ghi vào thư mục con
+    riêng run_<index> nên các tiến trình không ghi đè lên nhau
+    keep_waypoints: giữ danh sách waypoint trong kết quả (khóa 'waypoints')
+    profile_root: nếu có, ghi profile cProfile của bước plan vào run_<index>_<planner>.prof
+    Trả về: dict kết quả (kèm index, run, size, obstacle_ratio, planner, seed)
+    """
+    index, run, size, ratio, planner, seed = job
+    checkpoint_dir = None
+    if checkpoint_root is not None:
+        checkpoint_dir = os.path.join(checkpoint_root, f"run_{index:06d}")
+    profile_file = None
+    if profile_root is not None:
+        os.makedirs(profile_root, exist_ok=True)
+        profile_file = os.path.join(profile_root, f"run_{index:06d}_{planner}.prof")
+
+    _, waypoints, result = run_pipeline(
+        lambda: generate_stage(size, ratio, seed),
+        PLANNERS[planner],
+        checkpoint_dir=checkpoint_dir,
+        label=planner,
+        profile_file=profile_file,
+    )
+    result.update(index=index, run=run, size=size, obstacle_ratio=ratio,
+                  planner=planner, seed=seed)
+    if keep_waypoints:
+        result['waypoints'] = waypoints
+    return result
+
+
+def _run_job(args):
+    return run_job(*args)
+
+
+def run_sweep(runs, sizes=(19,), ratios=(0.1,), planners=("gpt",), master_seed=0,
+              workers=None, checkpoint_root=None, keep_waypoints=False, profile_root=None):
+    """
+    Chạy sweep planner x size x ratio x runs trên nhiều tiến trình
+    Mỗi lần chạy độc lập hoàn toàn (bản đồ, waypoint và file checkpoint riêng)
+    nên kết quả giống nhau với mọi số tiến trình.
+    workers: số tiến trình (None: số CPU, 1: chạy ngay trong tiến trình hiện tại)
+    Trả về: danh sách dict kết quả theo thứ tự index
+    """
+    jobs = experiment_jobs(runs, sizes, ratios, planners, master_seed)
+    tasks = [(job, checkpoint_root, keep_waypoints, profile_root) for job in jobs]
+    if workers == 1:
+        return [_run_job(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_run_job, tasks, chunksize=max(1, len(tasks) // 64)))
+
+
+def run_experiment(runs, size=19, obstacle_ratio=0.1, planner="gpt", seed=0, checkpoint_dir=None,
+                   keep_waypoints=False):
+    """
+    Chạy tuần tự runs lần pipeline với cùng cấu hình (xem run_sweep)
+    """
+    return run_sweep(runs, (size,), (obstacle_ratio,), (planner,), seed, workers=1,
+                     checkpoint_root=checkpoint_dir, keep_waypoints=keep_waypoints)
+
+
+def summarize(results):
+    """
+    Gộp kết quả theo (planner, size, obstacle_ratio)
+    Trả về: danh sách dict gồm số lần chạy, số lần không hợp lệ và giá trị
+    trung bình của các chỉ số chính (distance, turns, coverage_ratio, ...) trên các lần hợp lệ
+    """
+    groups = {}
+    for result in results:
+        key = (result['planner'], result['size'], result['obstacle_ratio'])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for (planner, size, ratio), group in sorted(groups.items()):
+        valid = [result for result in group if result['valid']]
+        row = {'planner': planner, 'size': size, 'obstacle_ratio': ratio,
+               'runs': len(group), 'invalid': len(group) - len(valid)}
+        for key in ('distance', 'turns', 'turns_180', 'revisits', 'coverage_ratio', 'time', 'energy'):
+            row[key] = float(np.mean([result[key] for result in valid])) if valid else float('nan')
+        summary.append(row)
+    return summary
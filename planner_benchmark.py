@@ -0,0 +1,301 @@
+import argparse
+import contextlib
+import csv
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from grid import OBSTACLE, Grid
+from map_generate import create_square_map
+from pipeline import PLANNERS, experiment_jobs
+from waypoint_evaluation import evaluate_run
+
+DEFAULT_SIZES = [19, 100, 500, 1000, 2000]
+DEFAULT_RATIOS = [0.05, 0.1, 0.2, 0.4]
+# Bản đồ lớn chỉ dùng để đo thời gian create_square_map, và giới hạn thời gian (giây)
+MAP_GENERATION_SIZES = [5000]
+MAP_GENERATION_BUDGET = 1.0
+
+# Cột của báo cáo CSV (mỗi dòng là một lần chạy planner trên một bản đồ)
+REPORT_FIELDS = ['planner', 'size', 'obstacle_ratio', 'actual_ratio', 'run', 'seed',
+                 'wall_time', 'peak_memory', 'memory_method', 'valid', 'distance', 'turns',
+                 'coverage_ratio', 'waypoint_count']
+# Khóa ghép một lần chạy với lần chạy tương ứng trong báo cáo gốc
+RECORD_KEY = ('planner', 'size', 'obstacle_ratio', 'run', 'seed')
+
+
+def _max_rss():
+    """
+    Bộ nhớ thường trú đỉnh (byte) của tiến trình hiện tại
+    Trên Linux ru_maxrss được giữ qua exec (tiến trình 'spawn' mang theo mức đỉnh
+    của tiến trình cha), nên ưu tiên VmHWM của /proc/self/status
+    """
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024  # ru_maxrss tính bằng KiB ngoài macOS
+
+
+def _peak_rss_growth(args):
+    """
+    Chạy trong một tiến trình con mới: bộ nhớ thường trú đỉnh tăng thêm (byte)
+    trong lúc lập đường, so với ngay sau khi nhận bản đồ
+    """
+    cells, start, goal, planner = args
+    before = _max_rss()
+    grid = Grid(cells, start, goal)
+    PLANNERS[planner](grid, grid.start)
+    return _max_rss() - before
+
+
+def measure_peak_rss(grid, planner):
+    """
+    Bộ nhớ đỉnh của một lần lập đường đo bằng mức thường trú đỉnh, không làm chậm planner
+    Mỗi lần đo dùng một tiến trình 'spawn' riêng để mức đỉnh của lần chạy trước
+    (hay của tiến trình gọi) không lẫn vào.
+    Trả về: số byte, hoặc None nếu hệ điều hành không có module resource (Windows)
+    """
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        return None
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_peak_rss_growth, (grid.cells, grid.start, grid.goal, planner)).result()
+
+
+def benchmark_job(job, memory_max_size=500):
+    """
+    Đo một planner trên một bản đồ của corpus
+    Thời gian đo trên một lần chạy không đo bộ nhớ. Bộ nhớ đỉnh (byte) đo trên
+    lần chạy thứ hai với Grid mới (danh sách kề chưa được cache): bằng tracemalloc
+    khi size <= memory_max_size (None: mọi kích thước), còn bản đồ lớn hơn thì
+    bằng measure_peak_rss, vì tracemalloc làm chậm chương trình 10-30 lần.
+    memory_method cho biết cách đo ('tracemalloc' / 'rss'); hai cách không so
+    sánh trực tiếp được với nhau.
+    Thông báo thử lại của create_square_map bị ẩn; khi bản đồ phải tạo lại với
+    ít chướng ngại vật hơn, actual_ratio cho biết tỉ lệ thật.
+    Trả về: dict theo REPORT_FIELDS
+    """
+    _, run, size, ratio, planner, seed = job
+    plan = PLANNERS[planner]
+    with contextlib.redirect_stdout(io.StringIO()):
+        map_grid, start_pos, end_pos = create_square_map(size, ratio, seed=seed)
+
+    grid = Grid.from_array(map_grid, start_pos, end_pos)
+    start_time = time.perf_counter()
+    waypoints = plan(grid, grid.start)
+    wall_time = time.perf_counter() - start_time
+    result = evaluate_run(grid, waypoints)
+
+    if memory_max_size is None or size <= memory_max_size:
+        grid = Grid.from_array(map_grid, start_pos, end_pos)
+        tracemalloc.start()
+        try:
+            plan(grid, grid.start)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        memory_method = 'tracemalloc'
+    else:
+        peak_memory = measure_peak_rss(grid, planner)
+        memory_method = 'rss' if peak_memory is not None else None
+
+    return {
+        'planner': planner,
+        'size': size,
+        'obstacle_ratio': ratio,
+        'actual_ratio': round(np.count_nonzero(grid.cells == OBSTACLE) / (size * size), 4),
+        'run': run,
+        'seed': seed,
+        'wall_time': wall_time,
+        'peak_memory': peak_memory,
+        'memory_method': memory_method,
+        'valid': bool(result['valid']),
+        'distance': int(result['distance']),
+        'turns': int(result['turns']),
+        'coverage_ratio': float(result['coverage_ratio']),
+        'waypoint_count': int(result['waypoint_count']),
+    }
+
+
+def time_map_generation(size, ratio, seed=0):
+    """
+    Thời gian (giây) create_square_map tạo một bản đồ size x size, kể cả kiểm tra
+    đường đi từ điểm xuất phát đến điểm kết thúc (thông báo thử lại bị ẩn)
+    """
+    start_time = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_square_map(size, ratio, seed=seed)
+    return time.perf_counter() - start_time
+
+
+def _benchmark_job(args):
+    return benchmark_job(*args)
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, ratios=DEFAULT_RATIOS, planners=("gpt", "a_star"), runs=1,
+                  master_seed=0, workers=1, memory_max_size=500):
+    """
+    Chạy các planner trên corpus cố định (cùng cách sinh seed với pipeline.experiment_jobs)
+    workers: số tiến trình; mặc định 1 để thời gian đo không bị các tiến trình khác làm nhiễu
+    Trả về: danh sách dict kết quả theo thứ tự lần chạy
+    """
+    jobs = experiment_jobs(runs, sizes, ratios, planners, master_seed)
+    tasks = [(job, memory_max_size) for job in jobs]
+    if workers == 1:
+        return [_benchmark_job(task) for task in tasks]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_benchmark_job, tasks))
+
+
+def write_report(records, filename, master_seed=0):
+    """
+    Ghi báo cáo: .json (kèm thông tin môi trường) hoặc .csv (một dòng mỗi lần chạy)
+    """
+    if filename.endswith('.csv'):
+        with open(filename, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(records)
+        return
+
+    report = {
+        'master_seed': master_seed,
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'records': records,
+    }
+    with open(filename, 'w') as file:
+        json.dump(report, file, indent=1)
+
+
+def read_report(filename):
+    """
+    Đọc báo cáo .json hoặc .csv
+    Trả về: danh sách dict kết quả
+    """
+    if not filename.endswith('.csv'):
+        with open(filename) as file:
+            return json.load(file)['records']
+
+    with open(filename, newline='') as file:
+        records = list(csv.DictReader(file))
+    for record in records:
+        for key in ('size', 'run', 'seed', 'distance', 'turns', 'waypoint_count'):
+            record[key] = int(record[key])
+        for key in ('obstacle_ratio', 'actual_ratio', 'wall_time', 'coverage_ratio'):
+            record[key] = float(record[key])
+        record['peak_memory'] = int(record['peak_memory']) if record['peak_memory'] else None
+        record['memory_method'] = record.get('memory_method') or None
+        record['valid'] = record['valid'] == 'True'
+    return records
+
+
+def compare_reports(records, baseline, time_tolerance=0.25, memory_tolerance=0.25, min_time=0.05,
+                    min_memory=2 ** 20):
+    """
+    So sánh với báo cáo gốc, theo từng lần chạy có cùng RECORD_KEY
+    Lỗi hồi quy: lần chạy hợp lệ trở thành không hợp lệ, đường đi dài hơn, nhiều
+    lần rẽ hơn, tỉ lệ bao phủ thấp hơn, hoặc thời gian / bộ nhớ đỉnh vượt quá
+    giá trị gốc theo tỉ lệ dung sai (và chênh lệch quá min_time giây / min_memory byte,
+    để các bản đồ nhỏ không báo lỗi vì nhiễu). Bộ nhớ chỉ so khi cùng memory_method.
+    Trả về: danh sách chuỗi mô tả các lỗi hồi quy
+    """
+    previous = {tuple(record[key] for key in RECORD_KEY): record for record in baseline}
+    regressions = []
+    for record in records:
+        old = previous.get(tuple(record[key] for key in RECORD_KEY))
+        if old is None:
+            continue
+        name = "{planner} size={size} ratio={obstacle_ratio:g} run={run}".format(**record)
+        if old['valid'] and not record['valid']:
+            regressions.append(f"{name}: path is no longer valid")
+        for key in ('distance', 'turns'):
+            if record[key] > old[key]:
+                regressions.append(f"{name}: {key} {old[key]} -> {record[key]}")
+        if record['coverage_ratio'] < old['coverage_ratio'] - 1e-9:
+            regressions.append(f"{name}: coverage {old['coverage_ratio']:.4f} -> {record['coverage_ratio']:.4f}")
+        if record['wall_time'] > max(old['wall_time'] * (1 + time_tolerance), old['wall_time'] + min_time):
+            regressions.append(f"{name}: wall time {old['wall_time']:.3f}s -> {record['wall_time']:.3f}s")
+        if (record['peak_memory'] and old['peak_memory']
+                and record.get('memory_method') == old.get('memory_method')
+                and record['peak_memory'] > max(old['peak_memory'] * (1 + memory_tolerance),
+                                                old['peak_memory'] + min_memory)):
+            regressions.append(f"{name}: peak memory {old['peak_memory']} -> {record['peak_memory']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coverage planners on a seeded map corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ratios", type=float, nargs="+", default=DEFAULT_RATIOS)
+    parser.add_argument("--planners", choices=sorted(PLANNERS), nargs="+", default=["gpt", "a_star"])
+    parser.add_argument("--runs", type=int, default=1, help="maps per size / ratio")
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=1, help="processes (timings are noisier above 1)")
+    parser.add_argument("--memory-max-size", type=int, default=500,
+                        help="measure memory with the (slow) tracemalloc pass up to this size, "
+                             "and with the peak RSS of a fresh process above it")
+    parser.add_argument("--output", default="benchmark.json", help="report file (.json or .csv)")
+    parser.add_argument("--baseline", default=None, help="earlier report to compare against")
+    parser.add_argument("--time-tolerance", type=float, default=0.25)
+    parser.add_argument("--min-time", type=float, default=0.05, help="ignore wall time changes below this (s)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25)
+    parser.add_argument("--map-sizes", type=int, nargs="*", default=MAP_GENERATION_SIZES,
+                        help="also time create_square_map at these sizes (ratio 0.2)")
+    parser.add_argument("--map-budget", type=float, default=MAP_GENERATION_BUDGET,
+                        help="fail when generating one of --map-sizes takes longer (s)")
+    args = parser.parse_args()
+
+    records = run_benchmark(args.sizes, args.ratios, args.planners, args.runs, args.seed,
+                            args.workers, args.memory_max_size)
+    write_report(records, args.output, args.seed)
+
+    print(f"{'planner':<14}{'size':>6}{'ratio':>7}{'time s':>10}{'peak MB':>9}"
+          f"{'length':>10}{'turns':>9}{'coverage':>10}")
+    for record in records:
+        memory = record['peak_memory'] / 2 ** 20 if record['peak_memory'] is not None else float('nan')
+        print(f"{record['planner']:<14}{record['size']:>6}{record['obstacle_ratio']:>7g}"
+              f"{record['wall_time']:>10.3f}{memory:>9.1f}{record['distance']:>10}"
+              f"{record['turns']:>9}{record['coverage_ratio']:>10.2%}")
+    print(f"\nReport written: {os.path.abspath(args.output)}")
+
+    regressions = []
+    for size in args.map_sizes:
+        elapsed = time_map_generation(size, 0.2, args.seed)
+        print(f"create_square_map {size}x{size} ratio 0.2: {elapsed:.2f}s (budget {args.map_budget:g}s)")
+        if elapsed > args.map_budget:
+            regressions.append(f"create_square_map size={size}: {elapsed:.2f}s > {args.map_budget:g}s")
+
+    if args.baseline:
+        regressions += compare_reports(records, read_report(args.baseline),
+                                       args.time_tolerance, args.memory_tolerance, args.min_time)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    if args.baseline:
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
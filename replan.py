@@ -0,0 +1,538 @@
+import argparse
+import contextlib
+import heapq
+import io
+import sys
+import time
+from collections import deque
+
+import numpy as np
+
+from grid import FREE, OBSTACLE, Grid
+from map_generate import label_components
+from shortest_path import BfsWorkspace
+
+
+class CoverageReplanner:
+    """
+    Sửa lộ trình bao phủ còn lại khi bản đồ thay đổi trong lúc robot đang chạy,
+    thay vì lập lại cả lộ trình từ đầu
+    tour: lộ trình còn lại, tour[0] là vị trí hiện tại của robot
+    covered: mặt nạ bool (rows, cols) các ô đã bao phủ (None: chỉ ô hiện tại)
+    Khi có ô mới bị chặn, chỉ các đoạn của tour đi qua ô đó được thay bằng một
+    đường vòng tìm bằng A* cục bộ giữa hai ô còn đi được ở hai đầu đoạn. Ô mới
+    được mở và chưa bao phủ, cùng mọi ô chưa bao phủ của vùng vừa được nối vào
+    vùng của robot, được chèn thành nhánh đi - về tại lần đầu tour đi qua ô kề
+    với chúng. Ô bị tách khỏi vùng của robot được bỏ khỏi tour.
+    Bản đồ được sửa tại chỗ trên mặt nạ bytearray, không dựng lại danh sách kề CSR
+    của Grid. Vùng robot tới được chỉ được gán nhãn cả bản đồ một lần khi khởi tạo;
+    sau đó được sửa bằng loang cục bộ quanh các ô thay đổi (_split_region,
+    _join_region), nên chi phí tỉ lệ với phần bản đồ và tour bị ảnh hưởng.
+    """
+
+    def __init__(self, grid, tour, covered=None):
+        self.rows, self.cols = grid.shape
+        self.cells = grid.cells.copy()
+        self.start, self.goal = grid.start, grid.goal
+        self.passable = bytearray(grid.passable_flat())
+
+        tour = np.asarray(tour, dtype=np.int64).reshape(-1, 2)
+        self.tour = tour[:, 0] * self.cols + tour[:, 1]
+        if covered is None:
+            self.covered = bytearray(self.rows * self.cols)
+        else:
+            self.covered = bytearray(np.asarray(covered, dtype=bool).tobytes())
+        self._covered = np.frombuffer(self.covered, dtype=np.uint8)
+        self._covered[self.tour[0]] = 1
+
+        # Mặt nạ vùng robot tới được (thành phần liên thông chứa vị trí hiện tại)
+        self.reachable = bytearray(self.rows * self.cols)
+        self._reachable = np.frombuffer(self.reachable, dtype=np.uint8)
+        self._label_region()
+
+        # Bộ nhớ A* dùng lại giữa các lần sửa (đánh dấu theo stamp, không xóa lại)
+        self.workspace = BfsWorkspace(self.rows * self.cols)
+        self._legs = {}
+
+    @property
+    def position(self):
+        return divmod(int(self.tour[0]), self.cols)
+
+    @property
+    def grid(self):
+        """
+        Bản đồ hiện tại dưới dạng Grid mới (để đánh giá hoặc lập lại từ đầu)
+        """
+        return Grid(self.cells.copy(), self.start, self.goal)
+
+    def remaining(self):
+        """
+        Lộ trình còn lại: mảng (M, 2) các tọa độ (hàng, cột), bắt đầu từ vị trí hiện tại
+        """
+        out = np.empty((len(self.tour), 2), dtype=np.int64)
+        ys = self.tour // self.cols
+        out[:, 0] = ys
+        out[:, 1] = self.tour - ys * self.cols
+        return out
+
+    def advance(self, steps=1):
+        """
+        Robot đi thêm steps bước theo tour; các ô đi qua được đánh dấu đã bao phủ
+        """
+        steps = min(steps, len(self.tour) - 1)
+        self._covered[self.tour[:steps + 1]] = 1
+        self.tour = self.tour[steps:]
+
+    def update(self, changes):
+        """
+        Áp dụng thay đổi bản đồ và sửa lộ trình còn lại
+        changes: dict hoặc danh sách cặp ((hàng, cột), blocked), blocked=True là ô
+        mới bị chặn, False là ô được mở
+        Trả về: lộ trình còn lại sau khi sửa (xem remaining)
+        """
+        if hasattr(changes, 'items'):
+            changes = changes.items()
+        rows, cols = self.rows, self.cols
+        blocked_nodes, freed_nodes = [], []
+        self._legs = {}  # Đường vòng A* đã tìm trong lần update này, theo (nguồn, đích)
+        for (y, x), blocked in changes:
+            if not (0 <= y < rows and 0 <= x < cols):
+                raise ValueError(f"Cell {(y, x)} is outside the {rows}x{cols} map")
+            node = y * cols + x
+            if blocked:
+                if node == self.tour[0]:
+                    raise ValueError(f"Current position {(y, x)} cannot become an obstacle")
+                if self.passable[node]:
+                    blocked_nodes.append(node)
+                self.cells[y, x] = OBSTACLE
+                self.passable[node] = 0
+            elif not self.passable[node]:
+                self.cells[y, x] = FREE
+                self.passable[node] = 1
+                freed_nodes.append(node)
+
+        # Sửa vùng robot còn tới được: ô bị tách khỏi robot được bỏ khỏi tour, và A* / BFS
+        # không bao giờ phải duyệt hết một vùng để phát hiện là không có đường. Ô mới vào
+        # vùng (ô vừa mở và cả túi trước đó không tới được mà ô đó nối vào) và chưa bao
+        # phủ phải được thêm vào tour.
+        joined = self._split_region(blocked_nodes)
+        joined += self._join_region(freed_nodes)
+        tour = self._reroute(self.tour, self._reachable)
+        self.tour = self._cover_freed(tour, joined)
+        return self.remaining()
+
+    def _label_region(self):
+        """
+        Gán lại cả mặt nạ vùng robot tới được bằng nhãn thành phần liên thông (NumPy)
+        Trả về: danh sách chỉ số phẳng các ô trước đó không tới được mà nay tới được
+        """
+        labels = label_components(self.cells == OBSTACLE).ravel()
+        reachable = labels == labels[self.tour[0]]
+        joined = np.flatnonzero(reachable & (self._reachable == 0))
+        self._reachable[:] = reachable
+        return joined.tolist()
+
+    def _split_region(self, blocked):
+        """
+        Bỏ khỏi vùng của robot các phần bị các ô mới chặn tách ra
+        Vùng cũ liên thông nên mỗi phần sau khi chặn đều chứa một ô kề ô bị chặn; vì
+        vậy chỉ cần xét các ô kề còn đi được của từng ô bị chặn: nối nhau qua vòng 8 ô
+        quanh nó, hoặc qua A* giới hạn số nút. A* được thử trước giữa hai ô tour đi
+        qua ngay trước và sau ô bị chặn: _reroute cần đúng các đường đó nên chúng được
+        giữ lại và không tính vào ngân sách. Khi A* không nối được, loang có giới hạn từ hai đầu tìm
+        phần nhỏ bị cắt rời (ví dụ đầu một ngõ cụt) và bỏ nó khỏi vùng. Chỉ khi không
+        xác định được trong ngân sách (vài phần trăm số ô) mới gán nhãn lại cả bản đồ
+        bằng NumPy.
+        Trả về: các ô mới vào vùng nếu đã phải gán nhãn lại (ô mới mở đã được tính
+        cùng lúc), ngược lại danh sách rỗng
+        """
+        reachable, passable = self.reachable, self.passable
+        robot = int(self.tour[0])
+        budget = max(256, len(passable) // 64)
+
+        # Cặp (ô trước, ô sau) của các lần tour đi qua đúng một ô bị chặn
+        tour = self.tour
+        passes = {}
+        for index in np.flatnonzero(np.isin(tour[1:-1], blocked)) + 1:
+            passes.setdefault(int(tour[index]), set()).add((int(tour[index - 1]), int(tour[index + 1])))
+
+        for node in blocked:
+            if not reachable[node]:
+                continue
+            reachable[node] = 0
+            if self._ring_connected(node):
+                continue  # Các ô kề vẫn nối với nhau qua vòng 8 ô quanh ô bị chặn
+            # Mỗi nhóm là tập các ô kề đã biết là nối với nhau; ô kề nằm trong một túi
+            # vài ô (đầu ngõ cụt vừa bị chặn) được bỏ ngay, không cần A*
+            groups = []
+            for seed in self._neighbors(node):
+                if not (passable[seed] and reachable[seed]):
+                    continue
+                piece = self._flood(seed, 4)
+                if piece is None:
+                    groups.append({seed})
+                elif robot in piece:
+                    self._reachable[:] = 0
+                    self._reachable[piece] = 1
+                    return []
+                else:
+                    for cut in piece:
+                        reachable[cut] = 0
+            for source, target in passes.get(node, ()):
+                first = next((group for group in groups if source in group), None)
+                second = next((group for group in groups if target in group), None)
+                if first is None or second is None or first is second:
+                    continue
+                if self._leg(source, target, budget) is None:
+                    budget -= self.workspace.expanded
+                    break
+                first |= second
+                groups.remove(second)
+            while len(groups) > 1:
+                source, target = next(iter(groups[0])), next(iter(groups[-1]))
+                if budget > 0 and self._leg(source, target, budget) is not None:
+                    budget -= self.workspace.expanded
+                    groups[0] |= groups.pop()
+                    continue
+                budget -= self.workspace.expanded
+                piece = self._flood(target, budget) or self._flood(source, budget)
+                if piece is None:
+                    return self._label_region()
+                budget -= len(piece)
+                if robot in piece:
+                    # Robot nằm trong phần bị cắt rời: vùng chỉ còn phần đó
+                    self._reachable[:] = 0
+                    self._reachable[piece] = 1
+                    return []
+                for cut in piece:
+                    reachable[cut] = 0
+                groups = [group for group in groups if reachable[next(iter(group))]]
+        return []
+
+    def _flood(self, source, limit):
+        """
+        Các ô cùng thành phần liên thông với source (chỉ số phẳng), hoặc None nếu
+        thành phần có hơn limit ô
+        """
+        passable = self.passable
+        seen = self.workspace.seen
+        stamp = self.workspace.next_stamp()
+        seen[source] = stamp
+        cells = [source]
+        for node in cells:
+            if len(cells) > limit:
+                return None
+            for nxt in self._neighbors(node):
+                if passable[nxt] and seen[nxt] != stamp:
+                    seen[nxt] = stamp
+                    cells.append(nxt)
+        return cells
+
+    def _ring_connected(self, node):
+        """
+        Các ô kề (4 hướng) còn đi được của node có nối với nhau qua vòng 8 ô quanh
+        node không (hai ô liên tiếp trên vòng luôn kề nhau theo 4 hướng)
+        """
+        y, x = divmod(node, self.cols)
+        ring = []
+        for dy, dx in ((-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)):
+            ny, nx = y + dy, x + dx
+            ring.append(0 <= ny < self.rows and 0 <= nx < self.cols
+                        and self.passable[ny * self.cols + nx])
+        # Số đoạn liên tiếp các ô đi được trên vòng có chứa ô kề 4 hướng
+        runs = 0
+        for i in range(0, 8, 2):
+            if ring[i] and not (ring[i - 1] and ring[i - 2]):
+                runs += 1
+        return runs <= 1
+
+    def _join_region(self, freed):
+        """
+        Thêm vào vùng của robot các ô mới mở kề vùng, cùng cả túi mà chúng nối vào
+        Trả về: danh sách chỉ số phẳng các ô mới vào vùng và chưa bao phủ
+        """
+        reachable, passable, covered = self.reachable, self.passable, self.covered
+        queue = deque()
+        for node in freed:
+            if not reachable[node] and any(reachable[n] for n in self._neighbors(node)):
+                reachable[node] = 1
+                queue.append(node)
+        joined = []
+        while queue:
+            node = queue.popleft()
+            if not covered[node]:
+                joined.append(node)
+            for nxt in self._neighbors(node):
+                if passable[nxt] and not reachable[nxt]:
+                    reachable[nxt] = 1
+                    queue.append(nxt)
+        return joined
+
+    def _reroute(self, tour, reachable):
+        """
+        Thay mỗi đoạn liên tiếp các ô không còn tới được bằng đường vòng A* cục bộ
+        (hai đầu đoạn cùng vùng với robot nên luôn nối lại được)
+        """
+        bad = reachable[tour] == 0
+        if not bad.any():
+            return tour
+
+        edges = np.diff(np.concatenate(([0], bad.view(np.int8), [0])))
+        pieces = []
+        kept = 0
+        for first, end in zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)):
+            pieces.append(tour[kept:first])
+            kept = end
+            if end == len(tour):
+                break  # Đoạn cuối bị chặn: không còn ô nào phải tới sau đó
+            source, target = int(tour[first - 1]), int(tour[end])
+            if source == target:
+                kept = end + 1  # Tour quay lại đúng ô trước đoạn bị chặn: bỏ cả vòng
+                continue
+            pieces.append(self._leg(source, target)[1:-1])
+        pieces.append(tour[kept:])
+        return np.concatenate(pieces)
+
+    def _neighbors(self, node):
+        y, x = divmod(node, self.cols)
+        if y > 0:
+            yield node - self.cols
+        if y < self.rows - 1:
+            yield node + self.cols
+        if x > 0:
+            yield node - 1
+        if x < self.cols - 1:
+            yield node + 1
+
+    def _cover_freed(self, tour, freed):
+        """
+        Thêm các ô mới vào vùng của robot, chưa bao phủ vào tour
+        Các ô này được gắn thành cây BFS bắt đầu từ các ô kề với tour; mỗi ô gốc của
+        tour đi hết cây của nó thành nhánh đi - về. Nhóm ô không kề tour (ví dụ chỉ kề
+        vùng đã bao phủ) được nối bằng đường BFS tới ô gần nhất của tour hoặc của cây.
+        """
+        first = np.full(len(self.passable), -1, dtype=np.int64)
+        first[tour[::-1]] = np.arange(len(tour) - 1, -1, -1)
+        pending = {node for node in freed if not self.covered[node] and first[node] < 0}
+        if not pending:
+            return tour
+
+        anchored = first >= 0
+        children = {}
+        queue = deque()
+        for node in sorted(pending):
+            anchor = next((n for n in self._neighbors(node) if anchored[n]), -1)
+            if anchor >= 0:
+                children.setdefault(anchor, []).append(node)
+                anchored[node] = True
+                queue.append(node)
+        while True:
+            while queue:
+                node = queue.popleft()
+                pending.discard(node)
+                for nxt in self._neighbors(node):
+                    if nxt in pending and not anchored[nxt]:
+                        anchored[nxt] = True
+                        children.setdefault(node, []).append(nxt)
+                        queue.append(nxt)
+            if not pending:
+                break
+            # Nhóm còn lại không kề tour: nối bằng đường BFS qua các ô đã bao phủ
+            path = self._path_to_tour(min(pending), anchored)
+            for parent, child in zip(path[:0:-1], path[-2::-1]):
+                children.setdefault(parent, []).append(child)
+                anchored[child] = True
+            queue.extend(path[:-1])
+
+        inserts = {anchor: self._detour(anchor, children) for anchor in children if first[anchor] >= 0}
+        pieces = []
+        kept = 0
+        for anchor in sorted(inserts, key=first.__getitem__):
+            index = int(first[anchor]) + 1
+            pieces.append(tour[kept:index])
+            pieces.append(np.array(inserts[anchor], dtype=np.int64))
+            kept = index
+        pieces.append(tour[kept:])
+        return np.concatenate(pieces)
+
+    @staticmethod
+    def _detour(root, children):
+        """
+        Đi hết cây các ô gắn vào root theo thứ tự DFS và quay lại root (không gồm root đầu)
+        """
+        out = []
+        stack = [(root, iter(children.get(root, ())))]
+        while stack:
+            child = next(stack[-1][1], None)
+            if child is None:
+                stack.pop()
+                if stack:
+                    out.append(stack[-1][0])
+            else:
+                out.append(child)
+                stack.append((child, iter(children.get(child, ()))))
+        return out
+
+    def _path_to_tour(self, source, anchored):
+        """
+        BFS từ source tới ô gần nhất có anchored[ô] (ô thuộc tour hoặc đã gắn vào tour)
+        Trả về: danh sách chỉ số phẳng từ source đến ô đó
+        """
+        passable = self.passable
+        workspace = self.workspace
+        parent, seen = workspace.parent, workspace.seen
+        stamp = workspace.next_stamp()
+        parent[source] = source
+        seen[source] = stamp
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            if anchored[node]:
+                path = [node]
+                while path[-1] != source:
+                    path.append(parent[path[-1]])
+                return path[::-1]
+            for nxt in self._neighbors(node):
+                if passable[nxt] and seen[nxt] != stamp:
+                    seen[nxt] = stamp
+                    parent[nxt] = node
+                    queue.append(nxt)
+        raise ValueError(f"Cell {divmod(source, self.cols)} is not connected to the tour")
+
+    def _leg(self, source, target, limit=None):
+        """
+        Như _find_leg, dùng lại đường đã tìm (theo cả hai chiều) trong lần update hiện tại
+        """
+        self.workspace.expanded = 0
+        path = self._legs.get((source, target))
+        if path is None:
+            path = self._legs.get((target, source))
+            if path is not None:
+                return path[::-1]
+            path = self._find_leg(source, target, limit)
+            if path is not None:
+                self._legs[source, target] = path
+        return path
+
+    def _find_leg(self, source, target, limit=None):
+        """
+        A* (heuristic Manhattan) trên mặt nạ passable hiện tại giữa hai ô phẳng cùng vùng
+        limit: số nút mở rộng tối đa (workspace.expanded là số nút đã mở rộng)
+        Trả về: mảng chỉ số phẳng từ source đến target; None nếu vượt limit hoặc
+        (khi có limit) không có đường
+        """
+        cols, last_row, last_col = self.cols, self.rows - 1, self.cols - 1
+        passable = self.passable
+        workspace = self.workspace
+        parent, seen = workspace.parent, workspace.seen
+        cost = workspace.cost_array()
+        stamp = workspace.next_stamp()
+        ty, tx = divmod(target, cols)
+        sy, sx = divmod(source, cols)
+
+        parent[source] = source
+        seen[source] = stamp
+        cost[source] = 0
+        h = abs(sy - ty) + abs(sx - tx)
+        heap = [(h, h, source)]
+        expanded = 0
+        while heap:
+            f, h, node = heapq.heappop(heap)
+            g = f - h
+            if g > cost[node]:
+                continue
+            if node == target:
+                break
+            expanded += 1
+            if limit is not None and expanded > limit:
+                workspace.expanded = expanded
+                return None
+            y, x = divmod(node, cols)
+            g += 1
+            for nxt, inside in ((node - cols, y > 0), (node + cols, y < last_row),
+                                (node - 1, x > 0), (node + 1, x < last_col)):
+                if inside and passable[nxt] and (seen[nxt] != stamp or g < cost[nxt]):
+                    seen[nxt] = stamp
+                    cost[nxt] = g
+                    parent[nxt] = node
+                    ny, nx = divmod(nxt, cols)
+                    h = abs(ny - ty) + abs(nx - tx)
+                    heapq.heappush(heap, (g + h, h, nxt))
+        else:
+            workspace.expanded = expanded
+            if limit is not None:
+                return None
+            raise ValueError(f"No path from {divmod(source, cols)} to {divmod(target, cols)}")
+
+        workspace.expanded = expanded
+        path = [target]
+        while path[-1] != source:
+            path.append(parent[path[-1]])
+        return np.array(path[::-1], dtype=np.int64)
+
+
+# Trường hợp đo mặc định (tỉ lệ vật cản, số ô bị chặn, số ô được mở mỗi lần update)
+# và ngưỡng p95 độ trễ một lần update
+LATENCY_CASES = [(0.1, 10, 5), (0.2, 30, 20)]
+P95_BUDGET_MS = 10.0
+
+
+def measure_latency(size, ratio, updates, blocked, freed, seed=0):
+    """
+    Độ trễ (ms) của từng lần update với thay đổi ngẫu nhiên: robot đi tiếp vài bước,
+    blocked ô trên tour phía trước bị chặn và freed vật cản được mở
+    """
+    from waypoint_gpt import refined_coverage_path_planning
+    from map_generate import create_square_map
+
+    rng = np.random.default_rng(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        map_grid, start_pos, end_pos = create_square_map(size, ratio, seed=seed)
+    grid = Grid.from_array(map_grid, start_pos, end_pos)
+    replanner = CoverageReplanner(grid, refined_coverage_path_planning(grid, start_pos))
+
+    latencies = []
+    for _ in range(updates):
+        replanner.advance(int(rng.integers(1, 500)))
+        if len(replanner.tour) < 2:
+            break
+        ahead = rng.integers(1, len(replanner.tour), size=blocked)
+        changes = {divmod(int(node), size): True for node in replanner.tour[ahead]}
+        changes.pop(replanner.position, None)
+        obstacles = np.flatnonzero(replanner.cells.ravel() == OBSTACLE)
+        for node in rng.choice(obstacles, size=min(freed, len(obstacles)), replace=False):
+            changes.setdefault(divmod(int(node), size), False)
+
+        start_time = time.perf_counter()
+        replanner.update(changes)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure replanning latency after random map changes")
+    parser.add_argument("--size", type=int, default=200)
+    parser.add_argument("--ratio", type=float, default=None, help="single case (default: LATENCY_CASES)")
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--blocked", type=int, default=10, help="cells blocked per update (around the tour ahead)")
+    parser.add_argument("--freed", type=int, default=5, help="obstacles removed per update")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=P95_BUDGET_MS, help="p95 latency budget (ms)")
+    args = parser.parse_args()
+
+    cases = LATENCY_CASES if args.ratio is None else [(args.ratio, args.blocked, args.freed)]
+    failures = 0
+    print(f"{'ratio':>6}{'blocked':>9}{'freed':>7}{'updates':>9}{'median':>9}{'p95':>9}{'max':>9}  status")
+    for ratio, blocked, freed in cases:
+        latencies = measure_latency(args.size, ratio, args.updates, blocked, freed, args.seed)
+        p95 = np.percentile(latencies, 95)
+        status = "ok" if p95 <= args.budget else "over budget"
+        failures += status != "ok"
+        print(f"{ratio:>6g}{blocked:>9}{freed:>7}{len(latencies):>9}{np.median(latencies):>9.2f}"
+              f"{p95:>9.2f}{max(latencies):>9.2f}  {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import sqlite3
+
+RESULTS_DB = "results.db"
+
+# Cột của bảng runs (theo thứ tự) và tiêu đề tương ứng trong báo cáo Excel
+RESULT_FIELDS = ['map_size', 'distance', 'turns', 'walkable_cells', 'waypoint_count',
+                 'coverage_ratio', 'label']
+EXCEL_HEADERS = ['Kích thước bản đồ', 'Độ dài đường đi', 'Số lần rẽ', 'Tổng số ô có thể đi',
+                 'Số waypoint', 'Tỉ lệ bao phủ', 'LLMs']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    map_size TEXT,
+    distance INTEGER,
+    turns INTEGER,
+    walkable_cells INTEGER,
+    waypoint_count INTEGER,
+    coverage_ratio REAL,
+    label TEXT
+);
+CREATE TABLE IF NOT EXISTS waypoints (
+    run_id INTEGER,
+    step INTEGER,
+    y INTEGER,
+    x INTEGER
+);
+"""
+
+
+class ResultsStore:
+    """
+    Kho kết quả chỉ ghi thêm (SQLite), thay cho việc mở lại và lưu toàn bộ
+    bfs.xlsx sau mỗi lần đánh giá
+    Các lần chạy được gom trong bộ đệm và ghi một lần mỗi batch_size lần chạy
+    (một transaction, executemany), nên chi phí ghi không phụ thuộc số lần chạy cũ.
+    Chỉ một tiến trình nên ghi vào một file; các worker trả kết quả về tiến trình chính.
+    """
+
+    def __init__(self, filename=RESULTS_DB, batch_size=500, store_waypoints=True):
+        self.filename = filename
+        self.batch_size = batch_size
+        self.store_waypoints = store_waypoints
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(_SCHEMA)
+        self.next_id = self.connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM runs").fetchone()[0]
+        self._runs = []
+        self._waypoints = []
+
+    def append(self, result, waypoints=None, label=""):
+        """
+        Thêm một lần chạy (dict của evaluate_run) vào bộ đệm
+        Trả về: id của lần chạy
+        """
+        run_id = self.next_id
+        self.next_id += 1
+        row = dict(result, label=label)
+        self._runs.append([run_id] + [row[field] for field in RESULT_FIELDS])
+        if self.store_waypoints and waypoints is not None:
+            if hasattr(waypoints, 'tolist'):
+                waypoints = waypoints.tolist()  # Mảng NumPy (N, 2): sqlite3 cần số nguyên Python
+            self._waypoints.extend((run_id, step, y, x) for step, (y, x) in enumerate(waypoints))
+
+        if len(self._runs) >= self.batch_size:
+            self.flush()
+        return run_id
+
+    def flush(self):
+        if not self._runs:
+            return
+        placeholders = ", ".join("?" * (len(RESULT_FIELDS) + 1))
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO runs (id, {', '.join(RESULT_FIELDS)}) VALUES ({placeholders})",
+                self._runs)
+            self.connection.executemany("INSERT INTO waypoints VALUES (?, ?, ?, ?)", self._waypoints)
+        self._runs = []
+        self._waypoints = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_to_excel(db_file=RESULTS_DB, excel_file="bfs.xlsx"):
+    """
+    Xuất toàn bộ kho kết quả ra báo cáo Excel (sheet "Thông số" và "Waypoints")
+    Ghi đè excel_file trong một lần, chỉ chạy khi cần báo cáo.
+    """
+    import pandas as pd
+
+    connection = sqlite3.connect(db_file)
+    try:
+        stats = pd.read_sql_query(
+            f"SELECT {', '.join(RESULT_FIELDS)} FROM runs ORDER BY id", connection)
+        waypoints = pd.read_sql_query(
+            "SELECT y, x, run_id FROM waypoints ORDER BY run_id, step", connection)
+    finally:
+        connection.close()
+
+    stats.columns = EXCEL_HEADERS
+    waypoints.columns = ['Y', 'X', 'Run ID']
+    with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+        stats.to_excel(writer, sheet_name='Thông số', index=False)
+        waypoints.to_excel(writer, sheet_name='Waypoints', index=False)
+    print(f"Exported {len(stats)} runs to {excel_file}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the results store to Excel")
+    parser.add_argument("--db", default=RESULTS_DB)
+    parser.add_argument("--excel", default="bfs.xlsx")
+    args = parser.parse_args()
+    export_to_excel(args.db, args.excel)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,64 +1,49 @@
-import subprocess
-import os
+import argparse
 import time
 
-def run_script(script_name):
-    """Run a Python script and print its output"""
-    print(f"\n{'='*50}")
-    print(f"Running {script_name}...")
-    print(f"{'='*50}")
-    
-    try:
-        # Run the script and capture output
-        result = subprocess.run(['python', script_name], 
-                                capture_output=True, 
-                                text=True, 
-                                check=True)
-        
-        # Print stdout
-        print("\nOutput:")
-        print(result.stdout)
-        
-        return True
-        
-    except subprocess.CalledProcessError as e:
-        print(f"\nError running {script_name}:")
-        print(f"Exit code: {e.returncode}")
-        print(f"Error output: {e.stderr}")
-        return False
+from pipeline import PLANNERS, run_sweep, summarize
+from results_store import RESULTS_DB, ResultsStore, export_to_excel
 
 def main():
-    # List of scripts to run in order
-    scripts = [
-        "map_generate.py",
-        "waypoint_gpt.py",
-        "waypoint_evaluation.py"
-    ]
-    
-    # Check if all scripts exist before running
-    missing_scripts = []
-    for script in scripts:
-        if not os.path.isfile(script):
-            missing_scripts.append(script)
-    
-    if missing_scripts:
-        print("Error: The following script files are missing:")
-        for script in missing_scripts:
-            print(f"- {script}")
-        return
-    
-    # Run each script in sequence
-    test = 10
-    for i in range(test):
-        print(f"Test{i}/{test}")
-        for script in scripts:
-            success = run_script(script)
-            if not success:
-                print(f"Pipeline stopped due to error in {script}")
-                continue
-            time.sleep(1)  # Small delay between scripts
-    
-    print("\nPipeline completed!")
+    parser = argparse.ArgumentParser(description="Run map -> plan -> evaluate in-process")
+    parser.add_argument("--runs", type=int, default=10, help="maps per size / ratio")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[19])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.1])
+    parser.add_argument("--planners", choices=sorted(PLANNERS), nargs="+", default=["gpt"])
+    parser.add_argument("--seed", type=int, default=0, help="master seed")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="write input_map.txt / waypoint_<planner>.txt of each run under here")
+    parser.add_argument("--db", default=RESULTS_DB, help="append-only results store")
+    parser.add_argument("--no-waypoints", action="store_true", help="store metrics only")
+    parser.add_argument("--excel", default=None, help="export the whole store to this .xlsx at the end")
+    parser.add_argument("--profile-dir", default=None, help="dump a cProfile of each planner run under here")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    results = run_sweep(args.runs, args.sizes, args.ratios, args.planners, args.seed,
+                        args.workers, args.checkpoint_dir, keep_waypoints=not args.no_waypoints,
+                        profile_root=args.profile_dir)
+    elapsed = time.perf_counter() - start_time
+
+    with ResultsStore(args.db, store_waypoints=not args.no_waypoints) as store:
+        for result in results:
+            if not result['valid']:
+                print(f"Run {result['index']} ({result['planner']}, seed {result['seed']}): Không được đi qua 1")
+            else:
+                store.append(result, result.get('waypoints'), label=result['planner'])
+
+    print(f"\n{'planner':<14}{'size':>6}{'ratio':>7}{'runs':>6}{'invalid':>8}"
+          f"{'length':>10}{'turns':>9}{'coverage':>10}")
+    for row in summarize(results):
+        print(f"{row['planner']:<14}{row['size']:>6}{row['obstacle_ratio']:>7g}{row['runs']:>6}"
+              f"{row['invalid']:>8}{row['distance']:>10.1f}{row['turns']:>9.1f}"
+              f"{row['coverage_ratio']:>10.2%}")
+
+    print(f"\nPipeline completed! {len(results)} runs in {elapsed:.2f}s")
+
+    if args.excel:
+        export_to_excel(args.db, args.excel)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,300 @@
+import heapq
+from array import array
+from collections import deque
+
+
+def _parent_array(size):
+    """
+    Mảng cha phẳng khởi tạo -1 (mã kiểu 'q' khi số ô vượt quá giới hạn int32)
+    """
+    typecode = 'i' if size < 2 ** 31 else 'q'
+    return array(typecode, [-1]) * size
+
+
+def reconstruct_path(parent, cols, goal):
+    """
+    Khôi phục đường đi từ mảng cha phẳng, goal là chỉ số phẳng của ô đích
+    Ô gốc là ô có parent[ô] == chính nó
+    """
+    path = []
+    node = goal
+    while True:
+        path.append(divmod(node, cols))
+        if parent[node] == node:
+            break
+        node = parent[node]
+    path.reverse()
+    return path
+
+
+class BfsWorkspace:
+    """
+    Bộ nhớ làm việc dùng lại giữa nhiều lần BFS trên cùng một bản đồ
+    Mỗi lần tìm kiếm tăng stamp thay vì cấp phát và xóa lại mảng cha, nên
+    chi phí một lần BFS chỉ tỉ lệ với số ô thực sự được duyệt.
+    """
+
+    def __init__(self, size):
+        self.parent = _parent_array(size)
+        self.seen = array('i', [0]) * size
+        self.stamp = 0
+        self.cost = None  # Chi phí g của A* / JPS, chỉ cấp phát khi cần
+        self.expanded = 0  # Số nút đã lấy ra / mở rộng trong lần tìm kiếm gần nhất
+
+    def cost_array(self):
+        if self.cost is None:
+            self.cost = array('i', [0]) * len(self.seen)
+        return self.cost
+
+    def next_stamp(self):
+        self.stamp += 1
+        return self.stamp
+
+
+def _bfs(grid, source, is_goal, workspace):
+    """
+    Lõi BFS trên chỉ số phẳng, dừng ở ô đầu tiên lấy ra thỏa is_goal(chỉ số)
+    Hàng xóm lấy từ danh sách kề CSR của grid (Grid.adjacency)
+    Số ô đã lấy ra khỏi hàng đợi được ghi vào workspace.expanded
+    Trả về chỉ số ô đích (mảng cha nằm trong workspace), hoặc -1 nếu không tìm thấy
+    """
+    offsets, targets = grid.adjacency()
+    parent = workspace.parent
+    seen = workspace.seen
+    stamp = workspace.next_stamp()
+
+    parent[source] = source
+    seen[source] = stamp
+    queue = deque([source])
+    expanded = 0
+
+    while queue:
+        node = queue.popleft()
+        expanded += 1
+        if is_goal(node):
+            workspace.expanded = expanded
+            return node
+
+        for nxt in targets[offsets[node]:offsets[node + 1]]:
+            if seen[nxt] != stamp:
+                seen[nxt] = stamp
+                parent[nxt] = node
+                queue.append(nxt)
+
+    workspace.expanded = expanded
+    return -1
+
+
+def bfs_path(grid, start, goal, workspace=None):
+    """
+    Tìm đường đi ngắn nhất (4 hướng) từ start đến goal trên Grid bằng BFS
+    Hàng đợi deque chứa chỉ số phẳng, mảng cha phẳng và đường đi chỉ được
+    khôi phục một lần khi tới đích.
+    workspace: BfsWorkspace dùng lại khi gọi nhiều lần trên cùng bản đồ
+    Trả về: danh sách (hàng, cột) từ start đến goal, hoặc None nếu không có đường
+    """
+    cols = grid.cols
+    if workspace is None:
+        workspace = BfsWorkspace(grid.rows * cols)
+
+    target = goal[0] * cols + goal[1]
+    found = _bfs(grid, start[0] * cols + start[1], target.__eq__, workspace)
+    if found < 0:
+        return None
+    return reconstruct_path(workspace.parent, cols, found)
+
+
+def bfs_nearest(grid, start, is_goal, workspace=None):
+    """
+    Tìm đường đi ngắn nhất từ start đến ô gần nhất thỏa is_goal(chỉ số phẳng i * cols + j)
+    is_goal có thể là bytearray.__getitem__ của một mặt nạ phẳng để tránh gọi hàm Python
+    Trả về: danh sách (hàng, cột) từ start đến ô đó, hoặc None nếu không có ô nào
+    """
+    cols = grid.cols
+    if workspace is None:
+        workspace = BfsWorkspace(grid.rows * cols)
+
+    found = _bfs(grid, start[0] * cols + start[1], is_goal, workspace)
+    if found < 0:
+        return None
+    return reconstruct_path(workspace.parent, cols, found)
+
+
+def _astar(grid, source, target, workspace):
+    """
+    A* trên danh sách kề CSR với heuristic Manhattan (solution_A.heuristic, viết
+    trực tiếp để tránh tạo tuple); hòa f thì ưu tiên nút gần đích hơn
+    Trả về target (mảng cha nằm trong workspace), hoặc -1 nếu không có đường
+    """
+    cols = grid.cols
+    offsets, targets = grid.adjacency()
+    parent, seen = workspace.parent, workspace.seen
+    cost = workspace.cost_array()
+    stamp = workspace.next_stamp()
+    ty, tx = divmod(target, cols)
+    sy, sx = divmod(source, cols)
+
+    parent[source] = source
+    seen[source] = stamp
+    cost[source] = 0
+    h = abs(sy - ty) + abs(sx - tx)
+    heap = [(h, h, source)]
+    expanded = 0
+
+    while heap:
+        f, h, node = heapq.heappop(heap)
+        g = f - h
+        if g > cost[node]:
+            continue  # Bản ghi cũ, nút đã được lấy ra với chi phí nhỏ hơn
+        expanded += 1
+        if node == target:
+            workspace.expanded = expanded
+            return node
+
+        g += 1
+        for nxt in targets[offsets[node]:offsets[node + 1]]:
+            if seen[nxt] != stamp or g < cost[nxt]:
+                seen[nxt] = stamp
+                cost[nxt] = g
+                parent[nxt] = node
+                y, x = divmod(nxt, cols)
+                h = abs(y - ty) + abs(x - tx)
+                heapq.heappush(heap, (g + h, h, nxt))
+
+    workspace.expanded = expanded
+    return -1
+
+
+def _jps(grid, source, target, workspace):
+    """
+    Jump Point Search cho lưới 4 hướng
+    Đường chuẩn: đi dọc có thể rẽ ngang ở bất kỳ ô nào, đi ngang chỉ rẽ dọc ở ô
+    có hàng xóm bắt buộc (ô trên / dưới trống nhưng ô chéo phía sau bị chặn).
+    Bước nhảy ngang dừng ở đích hoặc ô có hàng xóm bắt buộc; bước nhảy dọc dừng
+    ở đích hoặc ô mà một bước nhảy ngang từ đó tìm được điểm nhảy. A* chỉ chạy
+    trên các điểm nhảy (chi phí giữa hai điểm là khoảng cách Manhattan).
+    Trả về target (mảng cha giữa các điểm nhảy nằm trong workspace), hoặc -1
+    """
+    rows, cols = grid.shape
+    free = grid.passable_flat()
+    parent, seen = workspace.parent, workspace.seen
+    cost = workspace.cost_array()
+    stamp = workspace.next_stamp()
+    ty, tx = divmod(target, cols)
+    last_row = rows - 1
+
+    def jump_horizontal(y, x, dx):
+        row = y * cols
+        while True:
+            x += dx
+            if x < 0 or x >= cols or not free[row + x]:
+                return -1
+            node = row + x
+            if node == target:
+                return node
+            if y > 0 and free[node - cols] and not free[node - cols - dx]:
+                return node
+            if y < last_row and free[node + cols] and not free[node + cols - dx]:
+                return node
+
+    def jump_vertical(y, x, dy):
+        while True:
+            y += dy
+            if y < 0 or y > last_row or not free[y * cols + x]:
+                return -1
+            node = y * cols + x
+            if node == target or jump_horizontal(y, x, 1) >= 0 or jump_horizontal(y, x, -1) >= 0:
+                return node
+
+    parent[source] = source
+    seen[source] = stamp
+    cost[source] = 0
+    sy, sx = divmod(source, cols)
+    h = abs(sy - ty) + abs(sx - tx)
+    heap = [(h, h, source)]
+    expanded = 0
+
+    while heap:
+        f, h, node = heapq.heappop(heap)
+        g = f - h
+        if g > cost[node]:
+            continue
+        expanded += 1
+        if node == target:
+            workspace.expanded = expanded
+            return node
+
+        # Hướng đi tiếp theo hướng đã tới node
+        y, x = divmod(node, cols)
+        py, px = divmod(parent[node], cols)
+        if node == parent[node]:
+            directions = ((-1, 0), (1, 0), (0, -1), (0, 1))
+        elif py == y:
+            dx = 1 if x > px else -1
+            directions = [(0, dx)]
+            if y > 0 and free[node - cols] and not free[node - cols - dx]:
+                directions.append((-1, 0))
+            if y < last_row and free[node + cols] and not free[node + cols - dx]:
+                directions.append((1, 0))
+        else:
+            directions = ((1 if y > py else -1, 0), (0, -1), (0, 1))
+
+        for dy, dx in directions:
+            jump = jump_horizontal(y, x, dx) if dy == 0 else jump_vertical(y, x, dy)
+            if jump < 0:
+                continue
+            jy, jx = divmod(jump, cols)
+            new_cost = g + abs(jy - y) + abs(jx - x)
+            if seen[jump] != stamp or new_cost < cost[jump]:
+                seen[jump] = stamp
+                cost[jump] = new_cost
+                parent[jump] = node
+                h = abs(jy - ty) + abs(jx - tx)
+                heapq.heappush(heap, (new_cost + h, h, jump))
+
+    workspace.expanded = expanded
+    return -1
+
+
+def _expand_jumps(parent, cols, goal):
+    """
+    Khôi phục đường đi từng ô từ chuỗi điểm nhảy (các đoạn nối là đoạn thẳng)
+    """
+    jumps = reconstruct_path(parent, cols, goal)
+    path = [jumps[0]]
+    for (y, x), (ny, nx) in zip(jumps, jumps[1:]):
+        dy = (ny > y) - (ny < y)
+        dx = (nx > x) - (nx < x)
+        for k in range(1, abs(ny - y) + abs(nx - x) + 1):
+            path.append((y + k * dy, x + k * dx))
+    return path
+
+
+# Các thuật toán tìm đường điểm - điểm có chung giao diện (xem find_path)
+PATH_METHODS = ('bfs', 'astar', 'jps')
+
+
+def find_path(grid, start, goal, method='bfs', workspace=None):
+    """
+    Tìm đường đi ngắn nhất (4 hướng) từ start đến goal
+    method: 'bfs' (không định hướng), 'astar' (A* với heuristic Manhattan)
+    hoặc 'jps' (Jump Point Search, thường mở rộng ít nút nhất trên vùng trống rộng)
+    Cả ba cho đường đi cùng độ dài; các đường bằng nhau có thể khác nhau.
+    Trả về: danh sách (hàng, cột) từ start đến goal, hoặc None nếu không có đường
+    """
+    if method == 'bfs':
+        return bfs_path(grid, start, goal, workspace)
+    if method not in PATH_METHODS:
+        raise ValueError(f"Unknown path method {method!r}, expected one of {PATH_METHODS}")
+
+    cols = grid.cols
+    if workspace is None:
+        workspace = BfsWorkspace(grid.rows * cols)
+
+    search = _astar if method == 'astar' else _jps
+    found = search(grid, start[0] * cols + start[1], goal[0] * cols + goal[1], workspace)
+    if found < 0:
+        return None
+    if method == 'jps':
+        return _expand_jumps(workspace.parent, cols, found)
+    return reconstruct_path(workspace.parent, cols, found)
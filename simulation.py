@@ -3,58 +3,26 @@ import numpy as np
 from matplotlib.colors import ListedColormap
 import matplotlib.patches as mpatches
 
+from grid import read_grid
+from waypoint_io import read_waypoints
+
 # Đọc bản đồ từ file input_map.txt
 def read_map_file(file_path):
-    with open(file_path, 'r') as file:
-        map_data = file.read().strip()
-    
-    # Tách dữ liệu theo dòng
-    map_lines = map_data.splitlines()
-    
-    # Xác định số hàng và cột từ dữ liệu
-    n_rows = len(map_lines)
-    n_cols = len(map_lines[0].split())
-    
-    grid_map = []
-    for line in map_lines:
-        grid_map.append(line.split())
-    
-    return np.array(grid_map), n_rows, n_cols
+    grid = read_grid(file_path)
+    n_rows, n_cols = grid.shape
+    return grid, n_rows, n_cols
 
 # Đọc đường đi từ file waypoints_gpt.txt
 def read_waypoints_file(file_path):
-    with open(file_path, 'r') as file:
-        path_data = file.read().strip()
-    
-    # Loại bỏ dấu ngoặc đơn và tách (x, y)
-    path_coords = []
-    for line in path_data.splitlines():
-        # Loại bỏ dấu ngoặc và tách (x, y)
-        line = line.strip('()')
-        x, y = map(int, line.split(','))
-        path_coords.append((x, y))
-    return path_coords
+    return read_waypoints(file_path)
 
 # Đọc bản đồ từ file
 grid_map, n_rows, n_cols = read_map_file('input_map.txt')
 
-# Chuyển đổi các ký tự thành số để dễ vẽ
-numeric_map = np.zeros((n_rows, n_cols), dtype=int)
-start_pos = None
-goal_pos = None
-
-for i in range(n_rows):
-    for j in range(n_cols):
-        if grid_map[i, j] == '1':
-            numeric_map[i, j] = 1  # Vật cản
-        elif grid_map[i, j] == '*':
-            numeric_map[i, j] = 2  # Điểm khởi đầu
-            start_pos = (i, j)
-        elif grid_map[i, j] == '#':
-            numeric_map[i, j] = 3  # Điểm đích
-            goal_pos = (i, j)
-        else:
-            numeric_map[i, j] = 0  # Đường đi trống
+# Mã ô của Grid đã là số để vẽ: 0 trống, 1 vật cản, 2 điểm khởi đầu, 3 điểm đích
+numeric_map = grid_map.cells
+start_pos = grid_map.start
+goal_pos = grid_map.goal
 
 # Đọc đường đi từ file
 path_coords = read_waypoints_file('waypoint_gpt.txt')
@@ -1,29 +1,14 @@
 import heapq
 import numpy as np
 
+from grid import FREE, read_grid
+
 def read_map(filename):
-    with open(filename, 'r') as file:
-        content = file.read().strip()
-    
-    cells = content.split()
-    
-    # Xác định kích thước bản đồ hình vuông
-    size = int(len(cells) ** 0.5)
-    
-    # Tạo ma trận bản đồ
-    map_grid = np.zeros((size, size), dtype=object)
-    start_pos = None
-    
-    for i in range(size):
-        for j in range(size):
-            idx = i * size + j
-            if idx < len(cells):
-                cell = cells[idx]
-                map_grid[i, j] = cell
-                if cell == '*':
-                    start_pos = (i, j)
-    
-    return map_grid, start_pos
+    """
+    Đọc bản đồ từ file thành Grid (mảng uint8) và vị trí xuất phát '*'
+    """
+    map_grid = read_grid(filename)
+    return map_grid, map_grid.start
 
 def heuristic(a, b):
     """
@@ -33,58 +18,82 @@ def heuristic(a, b):
 
 def get_neighbors(grid, position):
     """
-    Trả về các ô có thể đi từ vị trí hiện tại
+    Trả về các ô có thể đi từ vị trí hiện tại (Lên, Xuống, Trái, Phải)
+    Lấy từ danh sách kề tính sẵn của Grid (Grid.adjacency)
     """
-    i, j = position
-    neighbors = []
-    directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # Phải, Xuống, Trái, Lên
-    
-    for di, dj in directions:
-        ni, nj = i + di, j + dj
-        if 0 <= ni < grid.shape[0] and 0 <= nj < grid.shape[1]:
-            if grid[ni, nj] == '0' or grid[ni, nj] == '*':
-                neighbors.append((ni, nj))
-    
-    return neighbors
+    offsets, targets = grid.adjacency()
+    node = position[0] * grid.cols + position[1]
+    return [divmod(nxt, grid.cols) for nxt in targets[offsets[node]:offsets[node + 1]]]
 
-def a_star_coverage(grid, start):
+def reconstruct_path(node_pos, node_parent, node):
+    """
+    Khôi phục đường đi từ gốc đến nút node bằng con trỏ cha
+    """
+    path = []
+    while node != -1:
+        path.append(node_pos[node])
+        node = node_parent[node]
+    path.reverse()
+    return path
+
+def a_star_coverage(grid, start, stats=None):
     """
     Thuật toán A* để bao phủ bản đồ
+    Hàng đợi chỉ lưu chỉ số nút trong cây con trỏ cha thay vì sao chép cả
+    đường đi, đường đi tốt nhất được khôi phục một lần ở cuối
+    Các ô được đánh số phẳng i * cols + j và hàng xóm lấy từ Grid.adjacency,
+    nên vòng lặp chính không tạo tuple và không kiểm tra biên
+    stats: instrumentation.PlannerStats (tùy chọn); số lần push / pop được suy ra
+    từ cây con trỏ cha và hàng đợi còn lại, vòng lặp chính không đổi
     """
+    if stats is not None:
+        stats.start('setup')
+    rows, cols = grid.shape
+    offsets, targets = grid.adjacency()
+    source = start[0] * cols + start[1]
+
     # Tạo bản đồ đánh dấu các ô đã đi qua
-    visited = np.zeros_like(grid, dtype=bool)
-    visited[start] = True
+    visited = bytearray(rows * cols)
+    visited[source] = 1
+    # Bộ đếm số ô đã bao phủ (thay cho np.sum(visited) mỗi lần lấy ra)
+    covered = 1
+    
+    # Cây con trỏ cha: vị trí và chỉ số nút cha của từng nút đã đưa vào hàng đợi
+    node_pos = [source]
+    node_parent = [-1]
     
     # Hàng đợi ưu tiên cho A*
     frontier = []
-    heapq.heappush(frontier, (0, start, [start]))
+    heapq.heappush(frontier, (0, source, 0))
     
     # Từ điển lưu giữ chi phí từ điểm bắt đầu đến mỗi ô
-    cost_so_far = {start: 0}
+    cost_so_far = {source: 0}
     
-    # Biến lưu giữ đường đi tốt nhất tìm được
-    best_path = []
+    # Nút cuối của đường đi tốt nhất tìm được
+    best_node = 0
     max_coverage = 0
-    total_accessible_cells = np.sum(grid == '0') + 1  # +1 for start cell
+    # Lần lấy ra cuối cùng khi đã bao phủ hết chỉ để dừng, không mở rộng nút
+    stop_pops = 0
+    total_accessible_cells = grid.free_count()  # Bao gồm cả ô xuất phát và ô đích
+    if stats is not None:
+        stats.stop('setup')
+        stats.start('search')
     
     while frontier:
-        current_cost, current_pos, path = heapq.heappop(frontier)
-        
-        # Kiểm tra độ bao phủ hiện tại
-        current_coverage = np.sum(visited)
-        coverage_ratio = current_coverage / total_accessible_cells
+        current_cost, current_pos, node = heapq.heappop(frontier)
         
         # Cập nhật đường đi tốt nhất nếu độ bao phủ cao hơn
-        if current_coverage > max_coverage:
-            max_coverage = current_coverage
-            best_path = path.copy()
+        if covered > max_coverage:
+            max_coverage = covered
+            best_node = node
         
         # Nếu đã bao phủ tất cả các ô có thể đi, dừng thuật toán
-        if current_coverage == total_accessible_cells:
+        if covered == total_accessible_cells:
+            stop_pops = 1
             break
         
         # Xét tất cả các ô lân cận
-        for next_pos in get_neighbors(grid, current_pos):
+        for next_pos in targets[offsets[current_pos]:offsets[current_pos + 1]]:
             # Chi phí để đi đến ô tiếp theo
             new_cost = cost_so_far[current_pos] + 1
             
@@ -97,19 +106,32 @@ def a_star_coverage(grid, start):
                 
                 if not visited[next_pos]:
                     priority -= 10  # Ưu tiên cao cho các ô chưa thăm
+                    # Đánh dấu ô đã thăm
+                    visited[next_pos] = 1
+                    covered += 1
                 
-                # Thêm vào hàng đợi
-                new_path = path.copy()
-                new_path.append(next_pos)
-                heapq.heappush(frontier, (priority, next_pos, new_path))
-                
-                # Đánh dấu ô đã thăm
-                visited[next_pos] = True
-    
+                # Thêm nút mới vào cây và vào hàng đợi
+                node_pos.append(next_pos)
+                node_parent.append(node)
+                heapq.heappush(frontier, (priority, next_pos, len(node_pos) - 1))
+    
+    if stats is not None:
+        stats.stop('search')
+        # Mỗi nút của cây con trỏ cha được push đúng một lần
+        stats.add('heap_pushes', len(node_pos))
+        stats.add('heap_pops', len(node_pos) - len(frontier))
+        stats.add('expansions', len(node_pos) - len(frontier) - stop_pops)
+        stats.add('cells_covered', covered)
+        stats.start('reconstruct')
+
     # Tính toán kết quả
+    best_path = [divmod(pos, cols) for pos in reconstruct_path(node_pos, node_parent, best_node)]
     path_length = len(best_path) - 1  # Trừ đi vị trí xuất phát
     coverage_ratio = max_coverage / total_accessible_cells
     
+    visited = np.frombuffer(visited, dtype=bool).reshape(rows, cols)
+    if stats is not None:
+        stats.stop('reconstruct')
     return best_path, path_length, coverage_ratio, visited
 def save_result_map(result_map, filename):
     """
@@ -127,13 +149,10 @@ def print_visited_map(grid, visited, path, start_pos):
     """
     Tạo và in bản đồ hiển thị các ô đã thăm
     """
-    result_map = grid.copy()
+    result_map = grid.to_char_array()
     
     # Đánh dấu tất cả các ô đã thăm
-    for i in range(grid.shape[0]):
-        for j in range(grid.shape[1]):
-            if visited[i, j] and grid[i, j] == '0':
-                result_map[i, j] = 'v'  # 'v' cho visited (đã thăm)
+    result_map[visited & (grid.cells == FREE)] = 'v'  # 'v' cho visited (đã thăm)
     
     # Đánh dấu đường đi cuối cùng
     for pos in path:
@@ -151,7 +170,7 @@ def main():
     
     # In bản đồ ban đầu
     print("Bản đồ ban đầu:")
-    print(grid)
+    print(grid.to_char_array())
     print(f"Điểm xuất phát: {start_pos}")
     
     # Thực thi thuật toán A*
@@ -162,7 +181,7 @@ def main():
     print(f"Tỉ lệ bao phủ: {coverage_ratio * 100:.2f}%")
     
     # Tạo bản đồ kết quả với đường đi
-    result_map = grid.copy()
+    result_map = grid.to_char_array()
     for i, pos in enumerate(path):
         if i > 0:  # Bỏ qua điểm xuất phát
             result_map[pos] = '.'
@@ -0,0 +1,91 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# Module -> thời gian import tối đa (ms), đo sau khi numpy đã được import sẵn
+# (mọi module đều cần numpy, nên thời gian của nó không tính vào ngưỡng)
+STARTUP_BUDGET_MS = {
+    'grid': 15,
+    'shortest_path': 10,
+    'waypoint_io': 15,
+    'distance_field': 25,
+    'map_generate': 25,
+    'results_store': 15,
+    'waypoint_evaluation': 30,
+    'waypoint_gpt': 40,
+    'waypoint_gpt_v2': 20,
+    'solution_A': 15,
+    'boustrophedon': 40,
+    'stc': 40,
+    'instrumentation': 10,
+    'pipeline': 150,
+    'multi_robot': 100,
+}
+
+# Thư viện nặng chỉ được import trên nhánh code dùng đến chúng
+HEAVY_MODULES = ('matplotlib', 'pandas', 'openpyxl', 'dotenv', 'google.genai')
+
+_PROBE = """
+import sys, time, json
+import numpy
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'ms': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_import(module, repeat=5):
+    """
+    Đo thời gian import module trong tiến trình Python mới (lấy giá trị nhỏ nhất)
+    Tiến trình con chạy trong thư mục tạm rỗng: module đọc file lúc import sẽ lỗi.
+    Trả về: (ms, danh sách thư viện nặng đã bị import)
+    """
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=repo_dir + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    best, heavy = float('inf'), []
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            sample = json.loads(output.splitlines()[-1])
+            best = min(best, sample['ms'])
+            heavy = sample['heavy']
+    return best, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import time of the planner / evaluator modules")
+    parser.add_argument("modules", nargs="*", default=list(STARTUP_BUDGET_MS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'module':<22}{'ms':>8}{'budget':>8}  status")
+    for module in args.modules:
+        budget = STARTUP_BUDGET_MS.get(module, float('inf'))
+        try:
+            elapsed, heavy = measure_import(module, args.repeat)
+        except subprocess.CalledProcessError as error:
+            failures += 1
+            print(f"{module:<22}{'-':>8}{budget:>8g}  import failed: {error.stderr.strip().splitlines()[-1]}")
+            continue
+        status = "ok"
+        if heavy:
+            status = f"imports {', '.join(heavy)}"
+        elif elapsed > budget:
+            status = "over budget"
+        if status != "ok":
+            failures += 1
+        print(f"{module:<22}{elapsed:>8.1f}{budget:>8g}  {status}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
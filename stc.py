@@ -0,0 +1,236 @@
+from array import array
+from collections import deque
+
+import numpy as np
+
+from grid import read_grid
+from waypoint_gpt import write_waypoints_to_file
+
+# Loại hành động trong ngăn xếp khi duyệt cây
+_ENTER = 0
+_EMIT = 1
+
+
+def full_megacells(passable):
+    """
+    Mega-cell 2x2 (góc trên trái tại (2I, 2J)) mà cả bốn ô con đều trống
+    """
+    rows, cols = passable.shape
+    p = passable[:rows - rows % 2, :cols - cols % 2]
+    return p[0::2, 0::2] & p[0::2, 1::2] & p[1::2, 0::2] & p[1::2, 1::2]
+
+
+def spanning_forest(mega):
+    """
+    Cây khung BFS trên các mega-cell trống (4 hướng), mỗi thành phần liên thông một cây
+    Trả về: (nhãn thành phần của từng mega-cell, -1 nếu bị chặn,
+             cạnh cây ngang (I, J)-(I, J+1), cạnh cây dọc (I, J)-(I+1, J))
+    """
+    mr, mc = mega.shape
+    free = mega.tobytes()
+    label = array('i', [-1]) * (mr * mc)
+    right_edge = bytearray(mr * mc)
+    down_edge = bytearray(mr * mc)
+    last_row = (mr - 1) * mc
+
+    components = 0
+    for root in np.flatnonzero(mega).tolist():
+        if label[root] >= 0:
+            continue
+        label[root] = components
+        queue = deque([root])
+        while queue:
+            u = queue.popleft()
+            col = u % mc
+            if u >= mc and free[u - mc] and label[u - mc] < 0:
+                label[u - mc] = components
+                down_edge[u - mc] = 1
+                queue.append(u - mc)
+            if u < last_row and free[u + mc] and label[u + mc] < 0:
+                label[u + mc] = components
+                down_edge[u] = 1
+                queue.append(u + mc)
+            if col > 0 and free[u - 1] and label[u - 1] < 0:
+                label[u - 1] = components
+                right_edge[u - 1] = 1
+                queue.append(u - 1)
+            if col < mc - 1 and free[u + 1] and label[u + 1] < 0:
+                label[u + 1] = components
+                right_edge[u] = 1
+                queue.append(u + 1)
+        components += 1
+
+    shape = (mr, mc)
+    return (np.frombuffer(label, dtype=np.int32).reshape(shape),
+            np.frombuffer(right_edge, dtype=bool).reshape(shape)[:, :-1],
+            np.frombuffer(down_edge, dtype=bool).reshape(shape)[:-1, :])
+
+
+def circumnavigation_links(mega, right_edge, down_edge):
+    """
+    Nối các ô con thành chu trình đi vòng quanh cây khung (STC)
+    Mỗi mega-cell bắt đầu là một vòng 4 ô; với mỗi cạnh cây, bỏ hai cạnh
+    của vòng ở phía cạnh cây và thêm hai cạnh nối sang mega-cell bên kia,
+    nhờ đó các vòng được gộp thành một chu trình đi qua mọi ô con đúng một lần.
+    Trả về: (h, v) với h[y, x] là cạnh (y, x)-(y, x+1), v[y, x] là cạnh (y, x)-(y+1, x)
+    """
+    mr, mc = mega.shape
+    h = np.zeros((2 * mr, 2 * mc - 1), dtype=bool)
+    v = np.zeros((2 * mr - 1, 2 * mc), dtype=bool)
+
+    # Vòng 4 ô của mỗi mega-cell: cạnh trên, dưới, trái, phải
+    h[0::2, 0::2] = mega
+    h[1::2, 0::2] = mega
+    v[0::2, 0::2] = mega
+    v[0::2, 1::2] = mega
+
+    # Cạnh cây ngang (I, J)-(I, J+1): bỏ cạnh phải của A và cạnh trái của B
+    v[0::2, 1:-1:2] &= ~right_edge
+    v[0::2, 2::2] &= ~right_edge
+    h[0::2, 1::2] |= right_edge
+    h[1::2, 1::2] |= right_edge
+
+    # Cạnh cây dọc (I, J)-(I+1, J): bỏ cạnh dưới của A và cạnh trên của B
+    h[1:-1:2, 0::2] &= ~down_edge
+    h[2::2, 0::2] &= ~down_edge
+    v[1::2, 0::2] |= down_edge
+    v[1::2, 1::2] |= down_edge
+
+    return h, v
+
+
+def _cycle_neighbors(h, v, cols):
+    """
+    Hai ô kề trên chu trình của mỗi ô con, theo chỉ số phẳng của toàn bản đồ (cols cột)
+    """
+    height, width = v.shape[0] + 1, h.shape[1] + 1
+    ys, xs = np.mgrid[0:height, 0:width]
+    flat = ys * cols + xs
+
+    has_up = np.zeros((height, width), dtype=bool)
+    has_down = np.zeros((height, width), dtype=bool)
+    has_left = np.zeros((height, width), dtype=bool)
+    has_right = np.zeros((height, width), dtype=bool)
+    has_up[1:] = v
+    has_down[:-1] = v
+    has_left[:, 1:] = h
+    has_right[:, :-1] = h
+
+    up, down, left, right = flat - cols, flat + cols, flat - 1, flat + 1
+    first = np.where(has_up, up, np.where(has_down, down, np.where(has_left, left, right)))
+    second = np.where(has_right, right, np.where(has_left, left, np.where(has_down, down, up)))
+    return flat, first, second
+
+
+def stc_coverage(grid, start):
+    """
+    Spanning Tree Coverage trên mega-cell 2x2
+    Các mega-cell trống hoàn toàn được bao phủ bằng chu trình STC (mỗi ô con
+    đúng một lần). Ô thuộc mega-cell bị chặn một phần, hàng / cột lẻ ở biên
+    hoặc nằm ngoài chu trình được gắn vào bằng cây BFS trên toàn lưới: mỗi
+    nhánh là một chuyến đi rồi quay lại. Vì vậy đường đi bao phủ mọi ô đi tới
+    được từ start, dài không quá 2 lần số ô đó và chạy trong thời gian tuyến tính.
+    Trả về: danh sách waypoint (y, x) liên thông 4 hướng bắt đầu từ start
+    """
+    rows, cols = grid.shape
+    size = rows * cols
+    passable = grid.passable()
+    offsets, targets = grid.adjacency()
+
+    mega = full_megacells(passable)
+    mr, mc = mega.shape
+    label, right_edge, down_edge = spanning_forest(mega)
+
+    # Thành phần STC của mỗi ô (-1 nếu không thuộc mega-cell trống) và hai ô kề trên chu trình
+    comp = np.full((rows, cols), -1, dtype=np.int64)
+    comp[:2 * mr, :2 * mc] = np.repeat(np.repeat(label, 2, axis=0), 2, axis=1)
+    comp = comp.ravel()
+    next_a = np.full(size, -1, dtype=np.int64)
+    next_b = np.full(size, -1, dtype=np.int64)
+    if mr and mc:
+        h, v = circumnavigation_links(mega, right_edge, down_edge)
+        flat, first, second = _cycle_neighbors(h, v, cols)
+        inside = np.repeat(np.repeat(mega, 2, axis=0), 2, axis=1)
+        next_a[flat[inside]] = first[inside]
+        next_b[flat[inside]] = second[inside]
+
+    order = np.argsort(comp, kind='stable')
+    comp_bounds = np.searchsorted(comp[order], np.arange(label.max(initial=-1) + 2))
+    comp = comp.tolist()
+    next_a = next_a.tolist()
+    next_b = next_b.tolist()
+
+    # Cây BFS trên toàn lưới, mỗi thành phần STC được coi là một nút:
+    # khi chạm tới một ô của thành phần, cả thành phần được đánh dấu đã tới
+    seen = bytearray(size)
+    children = {}
+    queue = deque()
+
+    def reach(cell, parent):
+        k = comp[cell]
+        if k >= 0:
+            members = order[comp_bounds[k]:comp_bounds[k + 1]].tolist()
+            for member in members:
+                seen[member] = 1
+            queue.extend(members)
+        else:
+            seen[cell] = 1
+            queue.append(cell)
+        if parent >= 0:
+            children.setdefault(parent, []).append(cell)
+
+    source = start[0] * cols + start[1]
+    reach(source, -1)
+    while queue:
+        u = queue.popleft()
+        for w in targets[offsets[u]:offsets[u + 1]]:
+            if not seen[w]:
+                reach(w, u)
+
+    # Duyệt cây: ô lẻ đi xuống từng nhánh con rồi quay lại; thành phần STC đi
+    # hết chu trình từ ô vào, rẽ vào nhánh con tại các ô có nhánh
+    route = []
+    actions = [(_ENTER, source)]
+    while actions:
+        kind, cell = actions.pop()
+        if kind == _EMIT:
+            route.append(cell)
+            continue
+
+        if comp[cell] < 0:
+            route.append(cell)
+            for child in reversed(children.get(cell, ())):
+                actions.append((_EMIT, cell))
+                actions.append((_ENTER, child))
+            continue
+
+        loop = [cell]
+        prev, current = cell, next_a[cell]
+        while current != cell:
+            loop.append(current)
+            prev, current = current, (next_a[current] if next_a[current] != prev else next_b[current])
+
+        actions.append((_EMIT, cell))  # Đóng chu trình để quay về ô vào
+        for member in reversed(loop):
+            for child in reversed(children.get(member, ())):
+                actions.append((_EMIT, member))
+                actions.append((_ENTER, child))
+            actions.append((_EMIT, member))
+
+    # Bỏ đoạn quay về vô ích sau ô mới cuối cùng
+    route = np.array(route, dtype=np.int64)
+    _, first_visit = np.unique(route, return_index=True)
+    route = route[:first_visit.max() + 1]
+
+    ys, xs = np.divmod(route, cols)
+    return list(zip(ys.tolist(), xs.tolist()))
+
+
+def main():
+    grid = read_grid('input_map.txt')
+    waypoints = stc_coverage(grid, grid.start)
+    write_waypoints_to_file(waypoints, 'waypoint_stc.txt')
+
+
+if __name__ == "__main__":
+    main()
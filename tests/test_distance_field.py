@@ -0,0 +1,44 @@
+import numpy as np
+
+from distance_field import DistanceFieldCache, distance_field
+from grid import FREE, OBSTACLE, Grid
+
+
+def make_grid(size, seed):
+    cells = np.where(np.random.default_rng(seed).random((size, size)) < 0.2, OBSTACLE, FREE)
+    cells[0, 0] = FREE
+    return Grid(cells.astype(np.uint8), (0, 0))
+
+
+def test_descend_reaches_nearest_remaining_source():
+    grid = make_grid(30, 0)
+    passable = np.frombuffer(grid.passable_flat(), dtype=np.uint8)
+    field = DistanceFieldCache().get(grid, passable).copy()
+    sources = passable.copy()
+    for node in np.flatnonzero(passable)[:400]:
+        field.remove_source(int(node))
+        sources[node] = 0
+
+    expected = distance_field(grid, sources)
+    for node in np.flatnonzero(passable)[:50:7]:
+        path = field.descend(int(node))
+        if expected[node] < 0:
+            assert path is None
+        else:
+            assert len(path) - 1 == expected[node] and sources[path[-1]]
+
+
+def test_cache_is_bounded_by_bytes():
+    grids = [make_grid(40, seed) for seed in range(4)]
+    field_size = DistanceFieldCache().get(grids[0], [(0, 0)]).nbytes()
+    cache = DistanceFieldCache(max_bytes=2 * field_size)
+    for grid in grids:
+        cache.get(grid, [(0, 0)])
+    assert len(cache._fields) == 2 and cache.nbytes == 2 * field_size
+
+    cache.get(grids[0], [(0, 0)])
+    assert cache.misses == 5
+
+    small = DistanceFieldCache(max_bytes=field_size - 1)
+    assert small.get(grids[0], [(0, 0)]) is not None and small.nbytes == 0
+    small.clear()
@@ -0,0 +1,22 @@
+from planner_benchmark import benchmark_job, compare_reports, read_report, write_report
+from pipeline import experiment_jobs
+
+
+def test_large_maps_use_rss_and_reports_round_trip(tmp_path):
+    job = experiment_jobs(1, [19], [0.1], ["gpt"], 0)[0]
+    small = benchmark_job(job, memory_max_size=19)
+    large = benchmark_job(job, memory_max_size=0)
+    assert small['memory_method'] == 'tracemalloc' and small['peak_memory'] > 0
+    assert large['memory_method'] == 'rss' and large['peak_memory'] >= 0
+
+    filename = str(tmp_path / "report.csv")
+    write_report([small], filename)
+    assert read_report(filename) == [small]
+
+
+def test_compare_reports_only_compares_memory_of_the_same_method():
+    job = experiment_jobs(1, [19], [0.1], ["gpt"], 0)[0]
+    old = benchmark_job(job, memory_max_size=19)
+    new = dict(old, peak_memory=old['peak_memory'] + 2 ** 30)
+    assert any('peak memory' in line for line in compare_reports([new], [old]))
+    assert compare_reports([dict(new, memory_method='rss')], [old]) == []
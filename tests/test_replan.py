@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from grid import FREE, OBSTACLE, START, Grid
+from map_generate import label_components
+from replan import CoverageReplanner
+from waypoint_gpt import refined_coverage_path_planning
+
+
+def make_replanner():
+    # Túi 3x3 bị tường bao kín ở giữa bản đồ, cùng một vật cản lẻ
+    cells = np.full((12, 14), FREE, dtype=np.uint8)
+    cells[3:8, 5:10] = OBSTACLE
+    cells[4:7, 6:9] = FREE
+    cells[10, 2] = OBSTACLE
+    cells[0, 0] = START
+    grid = Grid(cells, (0, 0))
+    return CoverageReplanner(grid, refined_coverage_path_planning(grid, (0, 0)))
+
+
+def assert_tour_covers(replanner):
+    tour = replanner.remaining()
+    assert (np.abs(np.diff(tour, axis=0)).sum(axis=1) == 1).all()
+    cells = replanner.cells
+    assert (cells[tour[:, 0], tour[:, 1]] != OBSTACLE).all()
+
+    labels = label_components(cells == OBSTACLE)
+    reachable = labels == labels[replanner.position]
+    on_tour = np.zeros(cells.shape, dtype=bool)
+    on_tour[tour[:, 0], tour[:, 1]] = True
+    covered = np.frombuffer(replanner.covered, dtype=np.uint8).reshape(cells.shape) > 0
+    assert not (reachable & ~covered & ~on_tour).any()
+
+
+def test_block_free_and_pocket_merge_keep_tour_complete():
+    replanner = make_replanner()
+    assert_tour_covers(replanner)
+
+    replanner.advance(20)
+    ahead = tuple(replanner.remaining()[5])
+    replanner.update({ahead: True})
+    assert ahead not in map(tuple, replanner.remaining())
+    assert_tour_covers(replanner)
+
+    replanner.advance(10)
+    replanner.update({(10, 2): False})
+    assert_tour_covers(replanner)
+
+    replanner.update([((5, 5), False)])
+    assert_tour_covers(replanner)
+    remaining = set(map(tuple, replanner.remaining().tolist()))
+    assert {(y, x) for y in range(4, 7) for x in range(6, 9)} <= remaining
+
+    # Chặn lại lối vào: cả túi bị tách khỏi vùng của robot và bỏ khỏi tour
+    replanner.update({(5, 5): True})
+    assert_tour_covers(replanner)
+    remaining = set(map(tuple, replanner.remaining().tolist()))
+    assert not {(y, x) for y in range(4, 7) for x in range(6, 9)} & remaining
+
+
+def test_update_rejects_cells_outside_the_map():
+    replanner = make_replanner()
+    with pytest.raises(ValueError):
+        replanner.update({(-1, 0): True})
+    with pytest.raises(ValueError):
+        replanner.update({(0, 14): False})
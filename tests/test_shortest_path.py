@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from grid import FREE, OBSTACLE, Grid
+from instrumentation import PlannerStats
+from shortest_path import PATH_METHODS, BfsWorkspace, bfs_nearest, find_path
+
+
+def open_grid(size):
+    return Grid(np.full((size, size), FREE, dtype=np.uint8), (0, 0))
+
+
+def test_bfs_counts_dequeued_cells():
+    grid = open_grid(5)
+    workspace = BfsWorkspace(25)
+    assert len(find_path(grid, (0, 0), (4, 4), 'bfs', workspace)) == 9
+    assert workspace.expanded == 25
+
+    goal = bytearray(25)
+    goal[1] = 1
+    assert bfs_nearest(grid, (0, 0), goal.__getitem__, workspace) == [(0, 0), (0, 1)]
+    assert workspace.expanded == 3  # (0, 0), rồi (1, 0) được lấy ra trước (0, 1)
+
+    stats = PlannerStats()
+    stats.record_search(workspace)
+    assert stats.counters['search_expansions'] == 3 and stats.search_sizes == [3]
+
+
+@pytest.mark.parametrize("method", PATH_METHODS)
+def test_methods_find_shortest_paths(method):
+    cells = np.where(np.random.default_rng(1).random((20, 20)) < 0.25, OBSTACLE, FREE).astype(np.uint8)
+    cells[0, 0] = cells[19, 19] = FREE
+    grid = Grid(cells, (0, 0))
+    expected = find_path(grid, (0, 0), (19, 19), 'bfs')
+    path = find_path(grid, (0, 0), (19, 19), method)
+    assert (path is None) == (expected is None)
+    if path is not None:
+        assert len(path) == len(expected)
+        assert all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:]))
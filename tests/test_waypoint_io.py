@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from waypoint_io import (ENC_DELTA, ENC_RAW, iter_waypoints_text, load_waypoints,
+                         load_waypoints_text, read_binary_header, save_waypoints_binary,
+                         write_waypoints_text)
+
+PATH = [(0, 0), (0, 1), (0, 2), (1, 2), (2, 2), (2, 1), (2, 0), (1, 0), (1, 1)]
+
+
+@pytest.mark.parametrize("segments", [False, True])
+def test_text_round_trip(tmp_path, segments):
+    filename = str(tmp_path / "path.txt")
+    write_waypoints_text(PATH, filename, segments=segments)
+    assert load_waypoints_text(filename).tolist() == [list(point) for point in PATH]
+    assert list(iter_waypoints_text(filename)) == PATH
+
+
+@pytest.mark.parametrize("encoding", [ENC_RAW, ENC_DELTA])
+def test_binary_round_trip(tmp_path, encoding):
+    filename = str(tmp_path / "path.wpt")
+    save_waypoints_binary(PATH, filename, encoding=encoding)
+    assert read_binary_header(filename)[1] == encoding
+    assert np.asarray(load_waypoints(filename)).tolist() == [list(point) for point in PATH]
+
+
+def test_text_accepts_space_separated_points(tmp_path):
+    filename = tmp_path / "path.txt"
+    filename.write_text("(0 0)\n0 1\n\n(1, 1)\n")
+    assert load_waypoints_text(str(filename)).tolist() == [[0, 0], [0, 1], [1, 1]]
+
+
+@pytest.mark.parametrize("content", ["(1, 2, 3)\n(4)\n", "(1, 2)\n(3)\n(4, 5, 6)\n", "(1, 2)\n(1, 2, 3)\n"])
+def test_text_rejects_malformed_lines(tmp_path, content):
+    filename = tmp_path / "path.txt"
+    filename.write_text(content)
+    with pytest.raises(ValueError):
+        load_waypoints_text(str(filename))
+    with pytest.raises(ValueError):
+        list(iter_waypoints_text(str(filename)))
+
+
+def test_text_skips_lines_without_numbers_like_the_iterator(tmp_path):
+    filename = tmp_path / "path.txt"
+    filename.write_text("foo\n(0, 0)\n(0, 1)\n")
+    assert load_waypoints_text(str(filename)).tolist() == [[0, 0], [0, 1]]
+    assert list(iter_waypoints_text(str(filename))) == [(0, 0), (0, 1)]
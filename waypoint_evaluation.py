@@ -1,31 +1,16 @@
-import pandas as pd
-import os
+import numpy as np
+
+from grid import OBSTACLE, read_grid
+from results_store import RESULTS_DB, ResultsStore
+from waypoint_io import load_waypoints, waypoints_to_array
 
 def read_map_from_file(filename):
-    grid = []
-    start = None
-    goal = None
-    
-    with open(filename, 'r') as file:
-        for y, line in enumerate(file):
-            line = line.strip()
-            if not line:
-                continue
-                
-            row = []
-            parts = line.split()
-            
-            for x, val in enumerate(parts):
-                if val == '*':
-                    start = (y, x)
-                    row.append(0)  # Giả sử vị trí bắt đầu là 0 (có thể đi qua)
-                elif val == '#':
-                    goal = (y, x)
-                    row.append(0)  # Giả sử vị trí đích là 0 (có thể đi qua)
-                else:
-                    row.append(int(val))
-            
-            grid.append(row)
+    """
+    Đọc bản đồ thành Grid (mảng uint8); ô '*' và '#' đều là ô có thể đi qua
+    """
+    grid = read_grid(filename)
+    start = grid.start
+    goal = grid.goal
     
     if start is None or goal is None:
         raise ValueError("Map must contain both start '*' and goal '#'")
@@ -34,201 +19,252 @@ def read_map_from_file(filename):
 
 
 def read_waypoints_from_file(filename):
-    waypoints = []
-    with open(filename, 'r') as file:
-        for line in file:
-            line = line.strip()
-            if line:
-                waypoint = tuple(map(int, line.strip('()').split(',')))
-                waypoints.append(waypoint)
-    return waypoints
+    """
+    Đọc waypoint thành mảng (N, 2); nhận cả "(y, x)", "(y x)" và file nhị phân
+    """
+    return load_waypoints(filename)
 
-def is_valid_path(waypoints, map_grid):
-    max_y = len(map_grid)
-    max_x = len(map_grid[0]) if max_y > 0 else 0
+def count_turns(path):
+    """
+    Đếm số lần rẽ của đường đi (mảng (N, 2) các (y, x))
+    Hướng của mỗi bước là dấu của (dy, dx); bước đứng yên giữ hướng cũ.
+    Trả về: (số lần rẽ không quay đầu (90° khi đi 4 hướng), số lần quay đầu 180°)
+    """
+    return _count_heading_changes(np.sign(np.diff(path, axis=0)))
 
-    for i, (y, x) in enumerate(waypoints):
-        # 1. Kiểm tra trong giới hạn bản đồ
-        if not (0 <= y < max_y and 0 <= x < max_x):
-            print(f"❌ Waypoint {i} ({y}, {x}) nằm ngoài bản đồ.")
-            return False
+def count_segment_turns(segments):
+    """
+    Như count_turns nhưng tính trực tiếp trên các đoạn thẳng (M, 5) của
+    waypoint_io.compress_segments, không cần khôi phục lại đường đi
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 5)
+    return _count_heading_changes(np.sign(segments[segments[:, 4] > 0, 2:4]))
 
-        # 2. Kiểm tra ô có thể đi
-        if map_grid[y][x] != 0:
-            print(f"❌ Waypoint {i} ({y}, {x}) không nằm trên ô có thể đi (giá trị: {map_grid[y][x]}).")
-            return False
+def _count_heading_changes(heading):
+    heading = heading[heading.any(axis=1)]
+    previous, current = heading[:-1], heading[1:]
+    changed = (previous != current).any(axis=1)
+    reversed_ = (previous == -current).all(axis=1)
+    return int(np.count_nonzero(changed & ~reversed_)), int(np.count_nonzero(reversed_))
 
-        # 3. Kiểm tra liền kề (bao gồm đi chéo)
-        if i > 0:
-            y_prev, x_prev = waypoints[i - 1]
-            dy = abs(y - y_prev)
-            dx = abs(x - x_prev)
+class CostModel:
+    """
+    Mô hình thời gian / năng lượng của robot
+    Thời gian = quãng đường * cell_size / speed + thời gian mỗi lần rẽ 90° / quay đầu 180°
+    Năng lượng = quãng đường * cell_size * energy_per_meter + năng lượng mỗi lần rẽ / quay đầu
+    """
 
-            if max(dx, dy) != 1:
-                print(f"❌ Waypoint {i} ({y}, {x}) không liền kề waypoint trước đó ({y_prev}, {x_prev}).")
-                return False
+    def __init__(self, cell_size=1.0, speed=1.0, turn_90_time=1.0, turn_180_time=2.0,
+                 energy_per_meter=1.0, turn_90_energy=0.5, turn_180_energy=1.0):
+        self.cell_size = cell_size
+        self.speed = speed
+        self.turn_90_time = turn_90_time
+        self.turn_180_time = turn_180_time
+        self.energy_per_meter = energy_per_meter
+        self.turn_90_energy = turn_90_energy
+        self.turn_180_energy = turn_180_energy
 
-    return True 
+    def evaluate(self, length, turns_90, turns_180):
+        """
+        Trả về: (thời gian, năng lượng) cho quãng đường length (đơn vị ô)
+        """
+        meters = length * self.cell_size
+        time = meters / self.speed + turns_90 * self.turn_90_time + turns_180 * self.turn_180_time
+        energy = (meters * self.energy_per_meter + turns_90 * self.turn_90_energy
+                  + turns_180 * self.turn_180_energy)
+        return time, energy
 
-def evaluate_waypoints(waypoints):
-    total_distance = 0
-    turns = 0
-    prev_direction = None
+def evaluate_path(map_grid, waypoints, cost_model=None, heatmap=False):
+    """
+    Kiểm tra và đo đường đi bằng NumPy trong một lượt, không vòng lặp Python
+    waypoints: danh sách (y, x) hoặc mảng (N, 2)
+    cost_model: CostModel dùng để tính time / energy (None: mặc định)
+    heatmap: thêm 'heatmap', mảng số lần đi qua từng ô (cùng kích thước bản đồ)
+    Trả về: dict gồm
+        valid, violation ('bounds' / 'obstacle' / 'adjacency' / None),
+        first_violation (chỉ số waypoint vi phạm đầu tiên, -1 nếu hợp lệ),
+        steps, length (đi chéo tính sqrt(2)), turns = turns_90 + turns_180,
+        revisits (số lần đi lại ô đã qua), redundant_ratio (revisits / steps),
+        covered_cells, walkable_cells, coverage_ratio, time, energy
+    """
+    path = waypoints_to_array(waypoints)
+    rows, cols = map_grid.shape
+    ys, xs = path[:, 0], path[:, 1]
+    steps = np.diff(path, axis=0)
 
-    for i in range(1, len(waypoints)):
-        x1, y1 = waypoints[i - 1]
-        x2, y2 = waypoints[i]
+    # 1. Trong giới hạn bản đồ, 2. không phải chướng ngại vật,
+    # 3. liền kề waypoint trước đó (bao gồm đi chéo)
+    inside = (ys >= 0) & (ys < rows) & (xs >= 0) & (xs < cols)
+    flat = np.where(inside, ys * cols + xs, 0)
+    blocked = inside & (map_grid.cells.ravel()[flat] == OBSTACLE)
+    not_adjacent = np.zeros(len(path), dtype=bool)
+    not_adjacent[1:] = np.abs(steps).max(axis=1) != 1
 
-        dx = x2 - x1
-        dy = y2 - y1
+    bad = ~inside | blocked | not_adjacent
+    first_violation = int(np.argmax(bad)) if bad.any() else -1
+    violation = None
+    if first_violation >= 0:
+        if not inside[first_violation]:
+            violation = 'bounds'
+        elif blocked[first_violation]:
+            violation = 'obstacle'
+        else:
+            violation = 'adjacency'
 
-        total_distance += 1
+    visits = np.bincount(flat[inside], minlength=rows * cols)
+    visited = visits > 0
+    total_walkable_cells = map_grid.free_count()
+    covered_cells = int(np.count_nonzero(visited & map_grid.passable().ravel()))
 
-        if dx != 0:
-            direction = 'horizontal'
-        elif dy != 0:
-            direction = 'vertical'
-        else:
-            direction = prev_direction
+    step_count = len(steps)
+    revisits = int(np.count_nonzero(inside)) - int(np.count_nonzero(visited))
+    length = float(np.hypot(steps[:, 0], steps[:, 1]).sum())
+    turns_90, turns_180 = count_turns(path)
+    time, energy = (cost_model or CostModel()).evaluate(length, turns_90, turns_180)
+
+    report = {
+        'valid': first_violation < 0,
+        'violation': violation,
+        'first_violation': first_violation,
+        'steps': step_count,
+        'length': length,
+        'turns': turns_90 + turns_180,
+        'turns_90': turns_90,
+        'turns_180': turns_180,
+        'revisits': revisits,
+        'redundant_ratio': revisits / step_count if step_count > 0 else 0,
+        'covered_cells': covered_cells,
+        'walkable_cells': total_walkable_cells,
+        'coverage_ratio': covered_cells / total_walkable_cells if total_walkable_cells > 0 else 0,
+        'time': time,
+        'energy': energy,
+    }
+    if heatmap:
+        report['heatmap'] = visits.reshape(rows, cols)
+    return report
+
+def is_valid_path(waypoints, map_grid):
+    report = evaluate_path(map_grid, waypoints)
+    i = report['first_violation']
+    if i < 0:
+        return True
 
-        if prev_direction and direction != prev_direction:
-            turns += 1
+    y, x = waypoints[i]
+    if report['violation'] == 'bounds':
+        print(f"❌ Waypoint {i} ({y}, {x}) nằm ngoài bản đồ.")
+    elif report['violation'] == 'obstacle':
+        print(f"❌ Waypoint {i} ({y}, {x}) không nằm trên ô có thể đi (giá trị: {map_grid.cells[y, x]}).")
+    else:
+        y_prev, x_prev = waypoints[i - 1]
+        print(f"❌ Waypoint {i} ({y}, {x}) không liền kề waypoint trước đó ({y_prev}, {x_prev}).")
+    return False
 
-        prev_direction = direction
+def evaluate_waypoints(waypoints):
+    path = waypoints_to_array(waypoints)
+    return max(len(path) - 1, 0), sum(count_turns(path))
 
-    return total_distance, turns
+def evaluate_segments(segments):
+    """
+    (số bước, số lần rẽ) của đường đi đã nén thành đoạn thẳng
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 5)
+    return int(segments[:, 4].sum()), sum(count_segment_turns(segments))
+
+def evaluate_run(map_grid, waypoints, cost_model=None):
+    """
+    Đánh giá một đường đi ngay trong bộ nhớ, không đọc / ghi file
+    Trả về: dict các chỉ số; valid = False nếu đường đi không hợp lệ
+    """
+    report = evaluate_path(map_grid, waypoints, cost_model)
+    map_height, map_width = map_grid.shape
+
+    return {
+        'map_size': f"{map_width}x{map_height}",
+        'distance': report['steps'],
+        'turns': report['turns'],
+        'walkable_cells': report['walkable_cells'],
+        'waypoint_count': len(waypoints),
+        'coverage_ratio': report['coverage_ratio'],
+        'turns_90': report['turns_90'],
+        'turns_180': report['turns_180'],
+        'revisits': report['revisits'],
+        'redundant_ratio': report['redundant_ratio'],
+        'time': report['time'],
+        'energy': report['energy'],
+        'valid': report['valid'],
+        'violation': report['violation'],
+        'first_violation': report['first_violation'],
+    }
 
-def run_waypoint_evaluation_from_file(map_grid, filename):
+def evaluate_multi_robot(map_grid, paths, labels=None, cost_model=None):
+    """
+    Đánh giá đường đi của nhiều robot chạy đồng thời trên cùng bản đồ
+    paths: danh sách đường đi, mỗi robot một đường
+    labels: mảng vùng của từng robot (multi_robot.partition_regions), nếu có thì
+        báo thêm tỉ lệ bao phủ trong vùng của từng robot
+    Trả về: dict gồm valid (mọi đường hợp lệ), makespan (thời gian của robot xong
+        muộn nhất theo cost_model), makespan_steps, total_steps, coverage_ratio
+        (hợp của mọi robot), overlap_cells (ô có hơn một robot đi qua) và robots:
+        danh sách chỉ số từng robot (steps, turns, time, energy, covered_cells,
+        coverage_ratio, region_cells, region_coverage, valid, violation)
+    """
+    if not paths:
+        raise ValueError("at least one robot path is required")
+    passable = map_grid.passable()
+    visitors = np.zeros(map_grid.shape, dtype=np.int32)
+    robots = []
+    for robot, waypoints in enumerate(paths):
+        report = evaluate_path(map_grid, waypoints, cost_model, heatmap=True)
+        visited = (report.pop('heatmap') > 0) & passable
+        visitors += visited
+        row = {key: report[key] for key in ('steps', 'turns', 'time', 'energy', 'covered_cells',
+                                            'coverage_ratio', 'valid', 'violation')}
+        if labels is not None:
+            region = labels == robot
+            region_cells = int(np.count_nonzero(region))
+            row['region_cells'] = region_cells
+            row['region_coverage'] = (int(np.count_nonzero(visited & region)) / region_cells
+                                      if region_cells > 0 else 0)
+        robots.append(row)
+
+    walkable_cells = map_grid.free_count()
+    covered_cells = int(np.count_nonzero(visitors))
+    return {
+        'valid': all(row['valid'] for row in robots),
+        'makespan': max((row['time'] for row in robots), default=0),
+        'makespan_steps': max((row['steps'] for row in robots), default=0),
+        'total_steps': sum(row['steps'] for row in robots),
+        'covered_cells': covered_cells,
+        'walkable_cells': walkable_cells,
+        'coverage_ratio': covered_cells / walkable_cells if walkable_cells > 0 else 0,
+        'overlap_cells': int(np.count_nonzero(visitors > 1)),
+        'robots': robots,
+    }
+
+def run_waypoint_evaluation_from_file(map_grid, filename, db_file=RESULTS_DB):
     waypoints = read_waypoints_from_file(filename)
-    r, tau = evaluate_waypoints(waypoints)
-    map_height = len(map_grid)
-    map_width = len(map_grid[0]) if map_height > 0 else 0
-    map_size = f"{map_width}x{map_height}"
+    result = evaluate_run(map_grid, waypoints)
 
-    if not is_valid_path(waypoints, map_grid):
+    if not result['valid']:
+        is_valid_path(waypoints, map_grid)
         print("Không được đi qua 1")
         return
 
     print(f"Waypoints: {waypoints}")
-    print(f"Distance (steps): {r}, Turns: {tau}")
-
-    visited_cells = set(waypoints)
-
-    total_walkable_cells = sum(row.count(0) for row in map_grid)
-    coverage_cells = len(visited_cells)
-    coverage_ratio = coverage_cells / total_walkable_cells if total_walkable_cells > 0 else 0
-
-    print(f"Length: {r}")
-    print(f"Coverage Ratio: {coverage_ratio:.2%}")
+    print(f"Distance (steps): {result['distance']}, Turns: {result['turns']}")
+    print(f"Length: {result['distance']}")
+    print(f"Coverage Ratio: {result['coverage_ratio']:.2%}")
+    print(f"Turns 90°: {result['turns_90']}, U-turns: {result['turns_180']}, "
+          f"Revisits: {result['revisits']} ({result['redundant_ratio']:.2%})")
+    print(f"Time: {result['time']:.1f}, Energy: {result['energy']:.1f}")
 
     # if r <= EVAL_THRESHOLD and tau <= EVAL_THRESHOLD:
     #     print("Waypoints accepted.")
     # else:
     #     print("Waypoints rejected based on evaluation criteria.")
-    
-    # Đường dẫn file Excel
-    excel_file = "bfs.xlsx"
-    
-    # Chuẩn bị dữ liệu mới
-    new_data = {
-        'Kích thước bản đồ': map_size,
-        'Độ dài đường đi': [r],
-        'Số lần rẽ': [tau],
-        'Tổng số ô có thể đi': [total_walkable_cells],
-        'Số waypoint': [len(waypoints)],
-        'Tỉ lệ bao phủ': [coverage_ratio],
-        'LLMs': filename[9:-4]
-    }
-    new_df = pd.DataFrame(new_data)
-    
-    # Chuẩn bị dữ liệu waypoints mới
-    new_waypoints = pd.DataFrame(waypoints, columns=['Y', 'X'])
-    
-    try:
-        # Kiểm tra xem file Excel đã tồn tại chưa
-        if os.path.exists(excel_file):
-            # Sử dụng openpyxl trực tiếp để bảo toàn công thức
-            from openpyxl import load_workbook
-            
-            # Đọc workbook hiện có
-            wb = load_workbook(excel_file)
-            
-            # Xử lý sheet "Thông số"
-            if "Thông số" in wb.sheetnames:
-                # Đọc sheet hiện có để xác định run_id và thêm dữ liệu mới
-                stats_sheet = wb["Thông số"]
-                
-                # Đếm số dòng hiện có (bỏ qua header)
-                row_count = stats_sheet.max_row - 1
-                
-                # Thêm dữ liệu mới vào sheet
-                row_idx = stats_sheet.max_row + 1
-                for col_idx, col_name in enumerate(new_data.keys(), start=1):
-                    stats_sheet.cell(row=row_idx, column=col_idx).value = new_data[col_name][0]
-            else:
-                # Nếu sheet chưa tồn tại, tạo mới
-                stats_sheet = wb.create_sheet("Thông số")
-                
-                # Thêm header
-                for col_idx, col_name in enumerate(new_data.keys(), start=1):
-                    stats_sheet.cell(row=1, column=col_idx).value = col_name
-                
-                # Thêm dữ liệu
-                for col_idx, col_name in enumerate(new_data.keys(), start=1):
-                    stats_sheet.cell(row=2, column=col_idx).value = new_data[col_name][0]
-                
-                row_count = 1  # Chỉ có 1 row (không tính header)
-            
-            # Xử lý sheet "Waypoints"
-            if "Waypoints" in wb.sheetnames:
-                waypoints_sheet = wb["Waypoints"]
-                
-                # Xác định run_id từ số dòng trong sheet "Thông số"
-                run_id = row_count
-                
-                # Thêm dữ liệu waypoints mới vào sheet
-                start_row = waypoints_sheet.max_row + 1
-                for i, (y, x) in enumerate(waypoints):
-                    waypoints_sheet.cell(row=start_row+i, column=1).value = y
-                    waypoints_sheet.cell(row=start_row+i, column=2).value = x
-                    waypoints_sheet.cell(row=start_row+i, column=3).value = run_id
-            else:
-                # Nếu sheet chưa tồn tại, tạo mới
-                waypoints_sheet = wb.create_sheet("Waypoints")
-                
-                # Thêm header
-                waypoints_sheet.cell(row=1, column=1).value = "Y"
-                waypoints_sheet.cell(row=1, column=2).value = "X"
-                waypoints_sheet.cell(row=1, column=3).value = "Run ID"
-                
-                # Thêm dữ liệu
-                run_id = row_count
-                for i, (y, x) in enumerate(waypoints):
-                    waypoints_sheet.cell(row=i+2, column=1).value = y
-                    waypoints_sheet.cell(row=i+2, column=2).value = x
-                    waypoints_sheet.cell(row=i+2, column=3).value = run_id
-            
-            # Lưu workbook
-            wb.save(excel_file)
-            print(f"Data written and preserved all sheets and formulas: {excel_file}")
-        else:
-            # Nếu file chưa tồn tại, sử dụng pandas để tạo mới
-            run_id = 1
-            new_waypoints['Run ID'] = run_id
-            
-            with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-                new_df.to_excel(writer, sheet_name='Thông số', index=False)
-                new_waypoints.to_excel(writer, sheet_name='Waypoints', index=False)
-                
-            print(f"Created new file: {excel_file}")
-            
-    except PermissionError:
-        # Nếu gặp lỗi quyền truy cập, thử lưu với tên file khác
-        alt_excel_file = "waypoint_report_new.xlsx"
-        with pd.ExcelWriter(alt_excel_file, engine='openpyxl') as writer:
-            new_df.to_excel(writer, sheet_name='Thông số', index=False)
-            new_waypoints.to_excel(writer, sheet_name='Waypoints', index=False)
-        print(f"Can not write {excel_file}. Instead: {alt_excel_file}")
+
+    with ResultsStore(db_file) as store:
+        store.append(result, waypoints, label=filename[9:-4])
 
 
 if __name__ == "__main__":
@@ -1,94 +1,133 @@
+from grid import read_grid
+from shortest_path import BfsWorkspace, bfs_nearest, find_path
+from waypoint_io import write_waypoints_text
+
 # Re-initialize required functions and variables due to code execution reset
-# Define functions to read map data from file
+# Define functions to read map data from file (returns a uint8 Grid)
 def read_map_from_file(filename):
-    map_data = []
-    with open(filename, 'r') as file:
-        for line in file:
-            row = line.strip().split()
-            map_data.append(row)
-    return map_data
+    return read_grid(filename)
 
-# Find new start and end points
+# Find new start and end points (cached on the Grid while parsing)
 def find_points(map_data):
-    start, end = None, None
-    for i, row in enumerate(map_data):
-        for j, val in enumerate(row):
-            if val == '*':
-                start = (i, j)
-            elif val == '#':
-                end = (i, j)
-    return start, end
-
-map_data = read_map_from_file('input_map.txt')
-start, end = find_points(map_data)
+    return map_data.start, map_data.goal
 
 # Adjust the directions for 4 movement (up, down, left, right)
 directions_4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
 # Refined coverage path planning for 4 directions
-def refined_coverage_path_planning(map_data, start):
-    rows, cols = len(map_data), len(map_data[0])
-    visited = set()
+# backtrack='stack': on a dead end, step straight back to the parent cell on the DFS stack
+#   while it still has unvisited neighbors; once the parent is fully explored, skip the
+#   exhausted stack frames and run a single BFS to the nearest unvisited cell, then continue
+#   the DFS from there. Stops as soon as everything reachable is covered.
+#   (A cached distance_field.DistanceField is not used here: jumps average ~5 cells, so one
+#   local BFS per jump (~90 cells) is cheaper than keeping a whole-map field up to date as
+#   cells get covered; 200x200 at 20% obstacles: 0.3-0.4 s with BFS, 1.7-2.0 s with the field.)
+# backtrack='bfs': original behaviour, one BFS per popped stack frame, ending back at start.
+# stats: optional instrumentation.PlannerStats; it is only touched once per search and at the
+#   end (loop counters are derived from the final state), so the DFS loop is unchanged.
+def refined_coverage_path_planning(map_data, start, backtrack='stack', stats=None):
+    if backtrack not in ('stack', 'bfs'):
+        raise ValueError(f"Unknown backtrack mode {backtrack!r}")
+    if stats is not None:
+        stats.start('setup')
+    rows, cols = map_data.shape
+    # Flat mask of passable cells not visited yet (index x * cols + y)
+    unvisited = bytearray(map_data.passable_flat())
     waypoints = []
     current = start
+    workspace = BfsWorkspace(rows * cols)  # reused by every backtrack search
+    # Precomputed neighbors in directions_4 order (see Grid.adjacency)
+    offsets, targets = map_data.adjacency()
+
+    def nearest_unvisited(cell):
+        return bfs_nearest(map_data, cell, unvisited.__getitem__, workspace)
 
-    def get_adjacent_unvisited(cell):
-        adj_cells = []
-        for dx, dy in directions_4:
-            nx, ny = cell[0] + dx, cell[1] + dy
-            if 0 <= nx < rows and 0 <= ny < cols and map_data[nx][ny] != '1' and (nx, ny) not in visited:
-                adj_cells.append((nx, ny))
-        return adj_cells
+    def first_adjacent_unvisited(cell):
+        node = cell[0] * cols + cell[1]
+        for nxt in targets[offsets[node]:offsets[node + 1]]:
+            if unvisited[nxt]:
+                return nxt
+        return -1
 
     stack = [current]
-    visited.add(current)
+    unvisited[current[0] * cols + current[1]] = 0
     waypoints.append(current)
+    if stats is not None:
+        stats.stop('setup')
+        stats.start('coverage')
 
     while stack:
         current = stack[-1]
-        adj_cells = get_adjacent_unvisited(current)
-        if adj_cells:
-            next_cell = adj_cells[0]  # pick first adjacent unvisited cell
-            visited.add(next_cell)
+        nxt = first_adjacent_unvisited(current)
+        if nxt >= 0:
+            next_cell = divmod(nxt, cols)  # pick first adjacent unvisited cell
+            unvisited[nxt] = 0
             waypoints.append(next_cell)
             stack.append(next_cell)
+        elif backtrack == 'stack':
+            stack.pop()
+            if stack and first_adjacent_unvisited(stack[-1]) >= 0:
+                waypoints.append(stack[-1])  # parent cell is adjacent, no search needed
+            else:
+                # Jump to the nearest unvisited cell; the path becomes the new stack
+                # so that consecutive frames stay adjacent
+                if stats is None:
+                    stack = nearest_unvisited(current)
+                else:
+                    stack = stats.timed('backtrack', nearest_unvisited, current)
+                    stats.record_search(workspace)
+                    if stack is not None:
+                        stats.add('jumps')
+                        stats.add('jump_cells', len(stack) - 1)
+                if stack is None:
+                    break
+                unvisited[stack[-1][0] * cols + stack[-1][1]] = 0
+                waypoints.extend(stack[1:])
         else:
             stack.pop()
             # If stuck, find nearest visited cell that has unvisited neighbors
             if stack:
-                path_to_unvisited = bfs(map_data, current, stack[-1])
+                path_to_unvisited = bfs(map_data, current, stack[-1], workspace, stats=stats)
                 if path_to_unvisited:
                     for cell in path_to_unvisited[1:]:  # Skip current position, already added
                         waypoints.append(cell)
 
+    if stats is not None:
+        stats.stop('coverage')
+        _record_coverage_counters(stats, backtrack, len(waypoints), map_data.free_count() - unvisited.count(1))
     return waypoints
 
-# Function to perform BFS search
-def bfs(map_data, start, end):
-    rows, cols = len(map_data), len(map_data[0])
-    visited = set()
-    queue = [(start, [start])]
-    visited.add(start)
-
-    while queue:
-        (x, y), path = queue.pop(0)
-        if (x, y) == end:
-            return path
-
-        for dx, dy in directions_4:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < rows and 0 <= ny < cols and map_data[nx][ny] != '1':
-                if (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(nx, ny)]))
+def _record_coverage_counters(stats, backtrack, waypoint_count, covered):
+    # Every DFS iteration either steps forward, steps back to the parent or searches
+    # (the last search finds nothing and ends the loop); only the searches are counted
+    # in the loop, the rest follows from the final counts
+    jumps = stats.counters['jumps']
+    if backtrack == 'bfs':
+        forward = covered - 1
+        expansions = 2 * forward + 1  # each pushed frame is popped once
+    else:
+        forward = covered - 1 - jumps  # a jump covers the cell it ends on
+        stats.add('parent_steps', waypoint_count - 1 - forward - stats.counters['jump_cells'])
+        expansions = forward + stats.counters['parent_steps'] + jumps + 1
+    stats.add('cells_covered', covered)
+    stats.add('dfs_steps', forward)
+    stats.add('expansions', expansions)
+    stats.add('waypoints', waypoint_count)
 
-    return None
+# Function to perform BFS search (deque frontier, flat parent array, see shortest_path.py)
+# method='astar' / 'jps' switches to a goal-directed search with the same result length
+def bfs(map_data, start, end, workspace=None, method='bfs', stats=None):
+    if stats is None:
+        return find_path(map_data, start, end, method, workspace)
+    if workspace is None:
+        workspace = BfsWorkspace(map_data.rows * map_data.cols)
+    path = stats.timed('bfs', find_path, map_data, start, end, method, workspace)
+    stats.record_search(workspace)
+    return path
 
 # Function to write waypoints to file
-def write_waypoints_to_file(waypoints, filename):
-    with open(filename, 'w') as file:
-        for point in waypoints:
-            file.write(f"({point[0]}, {point[1]})\n")
+def write_waypoints_to_file(waypoints, filename, segments=False):
+    write_waypoints_text(waypoints, filename, segments)
 
 # Main function
 def main():
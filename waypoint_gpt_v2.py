@@ -1,48 +1,39 @@
+from grid import read_grid
+from shortest_path import bfs_path
+from waypoint_io import write_waypoints_text
+
 # Re-initialize required functions and variables due to code execution reset
-# Define functions to read map data from file
+# Define functions to read map data from file (returns a uint8 Grid)
 def read_map_from_file(filename):
-    map_data = []
-    with open(filename, 'r') as file:
-        for line in file:
-            row = line.strip().split()
-            map_data.append(row)
-    return map_data
+    return read_grid(filename)
 
-# Find new start and end points
+# Find new start and end points (cached on the Grid while parsing)
 def find_points(map_data):
-    start, end = None, None
-    for i, row in enumerate(map_data):
-        for j, val in enumerate(row):
-            if val == '*':
-                start = (i, j)
-            elif val == '#':
-                end = (i, j)
-    return start, end
-
-map_data = read_map_from_file('input_map.txt')
-start, end = find_points(map_data)
+    return map_data.start, map_data.goal
 
 # Adjust the directions for 4 movement (up, down, left, right)
 directions_4 = [(-1, 0), (1, 0), (0, -1), (0, 1)]
 
 # Refined coverage path planning for 4 directions
-def refined_coverage_path_planning(map_data, start):
-    rows, cols = len(map_data), len(map_data[0])
-    visited = set()
+# Stops at the second visit of end (default: the goal stored on the Grid)
+def refined_coverage_path_planning(map_data, start, end=None):
+    if end is None:
+        end = map_data.goal
+    rows, cols = map_data.shape
+    offsets, targets = map_data.adjacency()
+    visited = bytearray(rows * cols)  # flat mask, index x * cols + y
     waypoints = []
     current = start
     end_visit_count = 0
 
+    # Precomputed neighbors in directions_4 order (see Grid.adjacency)
     def get_adjacent_unvisited(cell):
-        adj_cells = []
-        for dx, dy in directions_4:
-            nx, ny = cell[0] + dx, cell[1] + dy
-            if 0 <= nx < rows and 0 <= ny < cols and map_data[nx][ny] != '1' and (nx, ny) not in visited:
-                adj_cells.append((nx, ny))
-        return adj_cells
+        node = cell[0] * cols + cell[1]
+        return [divmod(nxt, cols) for nxt in targets[offsets[node]:offsets[node + 1]]
+                if not visited[nxt]]
 
     stack = [current]
-    visited.add(current)
+    visited[current[0] * cols + current[1]] = 1
     waypoints.append(current)
 
     while stack:
@@ -60,7 +51,7 @@ def refined_coverage_path_planning(map_data, start):
         adj_cells = get_adjacent_unvisited(current)
         if adj_cells:
             next_cell = adj_cells[0]  # pick first adjacent unvisited cell
-            visited.add(next_cell)
+            visited[next_cell[0] * cols + next_cell[1]] = 1
             waypoints.append(next_cell)
             stack.append(next_cell)
         else:
@@ -74,32 +65,13 @@ def refined_coverage_path_planning(map_data, start):
 
     return waypoints
 
-# Function to perform BFS search
+# Function to perform BFS search (deque frontier, flat parent array, see shortest_path.py)
 def bfs(map_data, start, end):
-    rows, cols = len(map_data), len(map_data[0])
-    visited = set()
-    queue = [(start, [start])]
-    visited.add(start)
-
-    while queue:
-        (x, y), path = queue.pop(0)
-        if (x, y) == end:
-            return path
-
-        for dx, dy in directions_4:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < rows and 0 <= ny < cols and map_data[nx][ny] != '1':
-                if (nx, ny) not in visited:
-                    visited.add((nx, ny))
-                    queue.append(((nx, ny), path + [(nx, ny)]))
-
-    return None
+    return bfs_path(map_data, start, end)
 
 # Function to write waypoints to file
 def write_waypoints_to_file(waypoints, filename):
-    with open(filename, 'w') as file:
-        for point in waypoints:
-            file.write(f"({point[0]}, {point[1]})\n")
+    write_waypoints_text(waypoints, filename)
 
 # Main function
 def main():
@@ -110,7 +82,7 @@ def main():
     start, end = find_points(map_data)
     
     # Run refined coverage path planning with 4 movement directions
-    waypoints = refined_coverage_path_planning(map_data, start)
+    waypoints = refined_coverage_path_planning(map_data, start, end)
     
     # Write waypoints to file
     write_waypoints_to_file(waypoints, 'waypoint_gpt.txt')
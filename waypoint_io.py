@@ -0,0 +1,402 @@
+import re
+import struct
+import sys
+from itertools import chain
+
+import numpy as np
+
+# Định dạng văn bản: mỗi dòng một waypoint "(y, x)"; khi đọc chấp nhận cả "(y x)",
+# "y, x" hoặc "y x" (waypoint_claude.txt dùng khoảng trắng thay cho dấu phẩy)
+_INT = re.compile(rb'-?\d+')
+_SEPARATORS = bytes.maketrans(b'(),', b'   ')
+# Bảng tra byte để kiểm tra cả file bằng NumPy: ký tự được phép trên đường nhanh
+# (chữ số, dấu trừ, ngoặc, dấu phẩy, khoảng trắng) và chữ số
+_TEXT_ALLOWED = np.zeros(256, dtype=bool)
+_TEXT_ALLOWED[list(b'0123456789-(), \t\r\n')] = True
+_DIGITS = np.zeros(256, dtype=bool)
+_DIGITS[list(b'0123456789')] = True
+
+# Chế độ nén đoạn thẳng: dòng đầu là SEGMENTS_HEADER, các dòng sau là điểm rẽ "(y, x)"
+# (điểm đầu mỗi đoạn thẳng và điểm cuối đường đi); người đọc nội suy lại các ô ở giữa
+SEGMENTS_HEADER = b'# segments'
+
+# Số waypoint xử lý mỗi lần khi ghi / giải mã để không tạo cả triệu chuỗi cùng lúc
+_CHUNK_POINTS = 1 << 16
+
+# Định dạng nhị phân: header 16 byte (little-endian) rồi đến dữ liệu
+#   magic 'WPTB', version, encoding, dtype (0: int16, 1: int32), 1 byte dự phòng, count (uint64)
+# encoding = ENC_RAW: count cặp (y, x), mở bằng np.memmap không sao chép
+# encoding = ENC_DELTA: waypoint đầu (y, x) rồi các bản ghi (dy, dx, run): bước (dy, dx)
+#   lặp lại run lần liên tiếp; đường bao phủ gồm các đoạn thẳng dài nên rất gọn
+BINARY_MAGIC = b'WPTB'
+BINARY_VERSION = 1
+ENC_RAW = 0
+ENC_DELTA = 1
+_DTYPES = (np.dtype('<i2'), np.dtype('<i4'))
+_HEADER = struct.Struct('<4sBBBxQ')
+
+
+def _iter_points_text(file, filename):
+    for line_number, line in enumerate(file, start=1):
+        numbers = _INT.findall(line)
+        if not numbers:
+            continue
+        if len(numbers) != 2:
+            raise ValueError(f"{filename}:{line_number}: expected 'y, x', got {line.strip()!r}")
+        yield int(numbers[0]), int(numbers[1])
+
+
+def iter_waypoints_text(filename):
+    """
+    Đọc từng waypoint (y, x) của file văn bản (generator, không nạp cả file)
+    Bỏ qua dòng trống; dòng không có đủ hai số nguyên gây ValueError.
+    File nén đoạn thẳng được nội suy lại thành từng ô.
+    """
+    with open(filename, 'rb') as file:
+        if file.read(len(SEGMENTS_HEADER)) != SEGMENTS_HEADER:
+            file.seek(0)
+            yield from _iter_points_text(file, filename)
+            return
+
+        previous = None
+        for point in _iter_points_text(file, filename):
+            if previous is None:
+                yield point
+            else:
+                (dy, dx), length = _straight_step(previous, point)
+                y, x = previous
+                for k in range(1, length + 1):
+                    yield y + k * dy, x + k * dx
+            previous = point
+
+
+def _is_plain_points(data):
+    """
+    Mọi dòng chỉ gồm số nguyên và dấu phân cách, và có 0 hoặc đúng 2 số nguyên
+    (khi đó np.fromstring cho cùng kết quả với iter_waypoints_text)
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if not len(buf):
+        return True
+    if not _TEXT_ALLOWED[buf].all():
+        return False
+    digit = _DIGITS[buf]
+    minus = buf == ord('-')
+    # Dấu trừ phải đứng ngay trước một chữ số và không dính sau số khác
+    if minus[-1] or (minus[:-1] & ~digit[1:]).any() or (minus[1:] & digit[:-1]).any():
+        return False
+    number_start = digit.copy()
+    number_start[1:] &= ~digit[:-1]
+    line = np.cumsum(buf == ord('\n'))
+    counts = np.bincount(line[number_start], minlength=int(line[-1]) + 1)
+    return not ((counts != 0) & (counts != 2)).any()
+
+
+def load_waypoints_text(filename):
+    """
+    Đọc cả file văn bản thành mảng int64 (N, 2) bằng NumPy (nhanh hơn generator)
+    Chỉ dùng đường nhanh khi mọi dòng không trống đều là một waypoint; nếu không,
+    đọc lại bằng iter_waypoints_text để áp cùng quy tắc (bỏ qua dòng không có số,
+    ValueError khi một dòng không có đúng hai số nguyên)
+    """
+    with open(filename, 'rb') as file:
+        data = file.read()
+    compressed = data.startswith(SEGMENTS_HEADER)
+    if compressed:
+        data = data[len(SEGMENTS_HEADER):]
+
+    if not _is_plain_points(data):
+        return waypoints_to_array(list(iter_waypoints_text(filename)))
+
+    values = np.fromstring(data.translate(_SEPARATORS).decode('ascii'), dtype=np.int64, sep=' ')
+    if len(values) % 2:
+        raise ValueError(f"{filename}: odd number of coordinates")
+    points = values.reshape(-1, 2)
+    return expand_turning_points(points) if compressed else points
+
+
+def write_waypoints_text(waypoints, filename, segments=False):
+    """
+    Ghi waypoint (danh sách (y, x) hoặc mảng (N, 2)) ra file văn bản "(y, x)" mỗi dòng
+    segments: chỉ ghi các điểm rẽ (xem turning_points); đọc lại bằng
+    load_waypoints / read_waypoints vẫn ra đủ từng ô
+    """
+    if segments:
+        waypoints = turning_points(compress_segments(waypoints))
+
+    with open(filename, 'w') as file:
+        if segments:
+            file.write(SEGMENTS_HEADER.decode('ascii') + '\n')
+        for i in range(0, len(waypoints), _CHUNK_POINTS):
+            chunk = waypoints[i:i + _CHUNK_POINTS]
+            if isinstance(chunk, np.ndarray):
+                chunk = chunk.tolist()
+            file.write(''.join([f"({y}, {x})\n" for y, x in chunk]))
+    return filename
+
+
+def waypoints_to_array(waypoints):
+    """
+    Chuyển danh sách waypoint (y, x) thành mảng int64 (N, 2); mảng NumPy được dùng lại
+    """
+    if isinstance(waypoints, np.ndarray):
+        return waypoints.reshape(-1, 2).astype(np.int64, copy=False)
+    flat = np.fromiter(chain.from_iterable(waypoints), dtype=np.int64, count=2 * len(waypoints))
+    return flat.reshape(-1, 2)
+
+
+def _step_runs(steps):
+    """
+    Chia dãy bước (M, 2) thành các dãy bước giống nhau liên tiếp
+    Trả về: (chỉ số bắt đầu của mỗi dãy, độ dài mỗi dãy)
+    """
+    change = np.ones(len(steps), dtype=bool)
+    change[1:] = (steps[1:] != steps[:-1]).any(axis=1)
+    starts = np.flatnonzero(change)
+    return starts, np.diff(np.append(starts, len(steps)))
+
+
+def compress_segments(waypoints):
+    """
+    Nén đường đi thành các đoạn thẳng, không mất thông tin
+    Trả về: mảng int64 (M, 5), mỗi hàng (y, x, dy, dx, length): đoạn bắt đầu
+    tại (y, x) và đi length bước (dy, dx). Đường một điểm là một đoạn length 0.
+    """
+    path = waypoints_to_array(waypoints)
+    if len(path) == 0:
+        return np.empty((0, 5), dtype=np.int64)
+
+    steps = np.diff(path, axis=0)
+    if len(steps) == 0:
+        return np.array([[path[0, 0], path[0, 1], 0, 0, 0]], dtype=np.int64)
+
+    starts, lengths = _step_runs(steps)
+    segments = np.empty((len(starts), 5), dtype=np.int64)
+    segments[:, :2] = path[starts]
+    segments[:, 2:4] = steps[starts]
+    segments[:, 4] = lengths
+    return segments
+
+
+def expand_segments(segments):
+    """
+    Khôi phục đường đi (N, 2) từ các đoạn của compress_segments
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 5)
+    if len(segments) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    lengths = segments[:, 4]
+    total = int(lengths.sum())
+    offsets = np.cumsum(lengths) - lengths
+    # Bước thứ k trong đoạn của nó (0 .. length - 1)
+    k = np.arange(total) - np.repeat(offsets, lengths)
+
+    path = np.empty((total + 1, 2), dtype=np.int64)
+    path[:-1] = np.repeat(segments[:, :2], lengths, axis=0) + \
+        k[:, None] * np.repeat(segments[:, 2:4], lengths, axis=0)
+    path[-1] = segments[-1, :2] + segments[-1, 4] * segments[-1, 2:4]
+    return path
+
+
+def turning_points(segments):
+    """
+    Các điểm rẽ của đường đi: điểm đầu mỗi đoạn và điểm cuối đường đi
+    Chỉ dùng được khi mọi bước là một bước ngang / dọc / chéo (không đứng yên, không nhảy)
+    """
+    segments = np.asarray(segments, dtype=np.int64).reshape(-1, 5)
+    if len(segments) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    moving = segments[:, 4] > 0
+    steps = segments[moving, 2:4]
+    if (np.abs(steps).max(axis=1, initial=0) != 1).any():
+        raise ValueError("Turning points need unit steps; use compress_segments instead")
+
+    end = segments[-1, :2] + segments[-1, 4] * segments[-1, 2:4]
+    return np.vstack([segments[moving, :2], end]) if moving.any() else segments[:1, :2].copy()
+
+
+def _straight_step(start, end):
+    """
+    Bước đơn vị và số bước đi thẳng (ngang / dọc / chéo) từ start tới end
+    """
+    dy, dx = end[0] - start[0], end[1] - start[1]
+    length = max(abs(dy), abs(dx))
+    if length == 0 or (dy and dx and abs(dy) != abs(dx)):
+        raise ValueError(f"{start} -> {end} is not a straight segment")
+    return ((dy > 0) - (dy < 0), (dx > 0) - (dx < 0)), length
+
+
+def expand_turning_points(points):
+    """
+    Nội suy lại đường đi (N, 2) từ các điểm rẽ của turning_points
+    """
+    points = waypoints_to_array(points)
+    if len(points) < 2:
+        return points.copy()
+
+    deltas = np.diff(points, axis=0)
+    lengths = np.abs(deltas).max(axis=1)
+    if (lengths == 0).any() or ((deltas != 0).all(axis=1) &
+                                (np.abs(deltas[:, 0]) != np.abs(deltas[:, 1]))).any():
+        raise ValueError("Turning points must be joined by straight segments")
+
+    segments = np.empty((len(deltas), 5), dtype=np.int64)
+    segments[:, :2] = points[:-1]
+    segments[:, 2:4] = np.sign(deltas)
+    segments[:, 4] = lengths
+    return expand_segments(segments)
+
+
+def _coordinate_dtype(path):
+    """
+    Mã kiểu nhỏ nhất (0: int16, 1: int32) chứa được mọi tọa độ và bước của path
+    """
+    if len(path) == 0:
+        return 0
+    low, high = int(path.min()), int(path.max())
+    # Bước (dy, dx) có thể lớn gấp đôi tọa độ khi đường đi không hợp lệ
+    span = max(abs(low), abs(high)) * 2
+    if span <= np.iinfo(np.int16).max:
+        return 0
+    if span <= np.iinfo(np.int32).max:
+        return 1
+    raise ValueError("Waypoint coordinates do not fit in int32")
+
+
+def _delta_records(path, dtype):
+    """
+    Mã hóa run-length các bước của path: mảng cấu trúc (dy, dx, run)
+    """
+    record = np.dtype([('dy', dtype), ('dx', dtype), ('run', '<u4')])
+    steps = np.diff(path, axis=0)
+    if len(steps) == 0:
+        return np.empty(0, dtype=record)
+
+    starts, runs = _step_runs(steps)
+
+    records = np.empty(len(starts), dtype=record)
+    records['dy'] = steps[starts, 0]
+    records['dx'] = steps[starts, 1]
+    records['run'] = runs
+    return records
+
+
+def save_waypoints_binary(waypoints, filename, encoding=ENC_RAW):
+    """
+    Ghi waypoint ra file nhị phân; kiểu int16 / int32 được chọn tự động theo tọa độ
+    encoding: ENC_RAW (mở được bằng memmap) hoặc ENC_DELTA (nhỏ hơn nhiều với đường bao phủ)
+    """
+    path = waypoints_to_array(waypoints)
+    dtype_code = _coordinate_dtype(path)
+    dtype = _DTYPES[dtype_code]
+
+    with open(filename, 'wb') as file:
+        file.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, encoding, dtype_code, len(path)))
+        if encoding == ENC_RAW:
+            file.write(path.astype(dtype).tobytes())
+        elif encoding == ENC_DELTA:
+            if len(path):
+                file.write(path[0].astype(dtype).tobytes())
+            file.write(_delta_records(path, dtype).tobytes())
+        else:
+            raise ValueError(f"Unknown waypoint encoding {encoding}")
+    return filename
+
+
+def read_binary_header(filename):
+    """
+    Đọc header của file waypoint nhị phân
+    Trả về: (count, encoding, dtype)
+    """
+    with open(filename, 'rb') as file:
+        data = file.read(_HEADER.size)
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{filename} is too short to be a binary waypoint file")
+
+    magic, version, encoding, dtype_code, count = _HEADER.unpack(data)
+    if magic != BINARY_MAGIC:
+        raise ValueError(f"{filename} is not a binary waypoint file")
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported binary waypoint version {version}")
+    if encoding not in (ENC_RAW, ENC_DELTA) or dtype_code >= len(_DTYPES):
+        raise ValueError(f"Corrupt binary waypoint header in {filename}")
+    return count, encoding, _DTYPES[dtype_code]
+
+
+def open_waypoints_binary(filename, mode='r'):
+    """
+    Mở file waypoint nhị phân thành mảng (N, 2)
+    Với ENC_RAW là np.memmap trên file (không sao chép, kiểu int16 / int32 như trong file);
+    với ENC_DELTA các bản ghi được memmap rồi giải mã ra mảng int64.
+    """
+    count, encoding, dtype = read_binary_header(filename)
+    if encoding == ENC_RAW:
+        if count == 0:
+            return np.empty((0, 2), dtype=dtype)
+        return np.memmap(filename, dtype=dtype, mode=mode, offset=_HEADER.size, shape=(count, 2))
+
+    path = np.empty((count, 2), dtype=np.int64)
+    if count == 0:
+        return path
+    first = np.fromfile(filename, dtype=dtype, count=2, offset=_HEADER.size)
+    record = np.dtype([('dy', dtype), ('dx', dtype), ('run', '<u4')])
+    offset = _HEADER.size + 2 * dtype.itemsize
+    records = np.memmap(filename, dtype=record, mode='r', offset=offset) \
+        if count > 1 else np.empty(0, dtype=record)
+
+    path[0] = first
+    runs = records['run'].astype(np.int64)
+    if runs.sum() != count - 1:
+        raise ValueError(f"Corrupt delta encoding in {filename}")
+    path[1:, 0] = np.repeat(records['dy'].astype(np.int64), runs)
+    path[1:, 1] = np.repeat(records['dx'].astype(np.int64), runs)
+    return np.cumsum(path, axis=0, out=path)
+
+
+def is_binary_waypoints(filename):
+    with open(filename, 'rb') as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def load_waypoints(filename):
+    """
+    Đọc file waypoint (văn bản hoặc nhị phân, tự nhận dạng) thành mảng (N, 2)
+    """
+    if is_binary_waypoints(filename):
+        return open_waypoints_binary(filename)
+    return load_waypoints_text(filename)
+
+
+def read_waypoints(filename):
+    """
+    Đọc file waypoint (văn bản hoặc nhị phân) thành danh sách (y, x)
+    """
+    if is_binary_waypoints(filename):
+        path = open_waypoints_binary(filename)
+        return list(zip(path[:, 0].tolist(), path[:, 1].tolist()))
+    return list(iter_waypoints_text(filename))
+
+
+def main():
+    """
+    Chuyển đổi giữa định dạng văn bản và nhị phân:
+    python waypoint_io.py waypoint_gpt.txt waypoint_gpt.wpt [--delta]
+    python waypoint_io.py waypoint_gpt.wpt waypoint_gpt.txt
+    """
+    args = [arg for arg in sys.argv[1:] if arg != '--delta']
+    if len(args) != 2:
+        print("Usage: python waypoint_io.py SOURCE DEST [--delta]")
+        return
+
+    source, dest = args
+    if is_binary_waypoints(source):
+        write_waypoints_text(open_waypoints_binary(source), dest)
+    else:
+        encoding = ENC_DELTA if '--delta' in sys.argv[1:] else ENC_RAW
+        save_waypoints_binary(load_waypoints_text(source), dest, encoding)
+    print(f"Waypoints written: {dest}")
+
+
+if __name__ == "__main__":
+    main()